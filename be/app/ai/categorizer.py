@@ -6,7 +6,31 @@ category information to embeddings.
 """
 
 import re
-from typing import Dict, List, Tuple
+import threading
+from array import array
+from collections import Counter
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Tuple
+
+import numpy as np
+
+from app.ai.issue_text import IssueText
+
+try:
+    import hyperscan
+except ImportError:  # no wheels on Windows; the fused regex below is used instead
+    hyperscan = None
+
+
+class CategoryResult(NamedTuple):
+    primary_category: str
+    categories: Tuple[str, ...]
+    confidence: float
+    scores: Mapping[str, float]
+
+
+# Shared result for issues that match no category
+_DEFAULT = CategoryResult("general", ("general",), 0.5, MappingProxyType({}))
 
 
 class IssueCategori:
@@ -87,72 +111,211 @@ class IssueCategori:
         }
     }
     
+    # Category ids index the per-call score arrays
+    CATEGORY_NAMES: Tuple[str, ...] = tuple(CATEGORY_PATTERNS)
+    
     def __init__(self):
-        # Compile regex patterns for efficiency
-        self.compiled_patterns = {}
-        for category, data in self.CATEGORY_PATTERNS.items():
-            # Create regex pattern that matches word stems (allows crash->crashes, fail->fails, etc.)
-            pattern = r'\b(' + '|'.join(re.escape(kw) for kw in data["keywords"]) + r')'
-            self.compiled_patterns[category] = {
-                "pattern": re.compile(pattern, re.IGNORECASE),
-                "weight": data["weight"]
-            }
+        # Structure-of-arrays layout: category id -> name / weight
+        self.weights: np.ndarray = np.array(
+            [self.CATEGORY_PATTERNS[category]["weight"] for category in self.CATEGORY_NAMES],
+            dtype=np.float64,
+        )
+        
+        # Split keywords into single words and fixed phrases, per category id
+        single_words: List[List[str]] = [[] for _ in self.CATEGORY_NAMES]
+        phrases: List[Tuple[int, Tuple[str, ...]]] = []
+        for idx, category in enumerate(self.CATEGORY_NAMES):
+            for keyword in self.CATEGORY_PATTERNS[category]["keywords"]:
+                words = tuple(keyword.lower().split())
+                if len(words) == 1:
+                    single_words[idx].append(words[0])
+                else:
+                    phrases.append((idx, words))
+        
+        # Keywords match as word stems (crash->crashes, fail->fails, etc.). Generate
+        # one fused pattern with a capture group per category, so a single C-level
+        # `match` per token finds its category via `lastindex`. That is exact only
+        # while no keyword is a stem of another category's keyword.
+        for idx, words in enumerate(single_words):
+            for other_idx, other_words in enumerate(single_words):
+                if idx == other_idx:
+                    continue
+                for word in words:
+                    for other in other_words:
+                        if other.startswith(word):
+                            raise ValueError(
+                                f"Keyword '{word}' ({self.CATEGORY_NAMES[idx]}) is a stem of "
+                                f"'{other}' ({self.CATEGORY_NAMES[other_idx]})"
+                            )
+        self.keyword_pattern = re.compile("|".join(
+            "(" + "|".join(re.escape(word) for word in words) + ")" if words else "((?!))"
+            for words in single_words
+        ))
+        
+        # Fixed phrases are matched as whole-word n-grams, indexed by their first
+        # word: first word -> [(words, category id, match count)]
+        self.phrase_index: Dict[str, List[Tuple[Tuple[str, ...], int, int]]] = {}
+        for idx, words in phrases:
+            # A phrase hit also counts any of its words that are keywords of
+            # the same category; net those out so it scores as one match.
+            overlaps = sum(1 for word in words if self._match_word(word) == idx)
+            self.phrase_index.setdefault(words[0], []).append((words, idx, 1 - overlaps))
+        self._zero_counts = array("d", [0.0] * len(self.CATEGORY_NAMES))
+        
+        self._hs_db = None
+        if hyperscan is not None:
+            self._build_hyperscan(single_words)
     
-    def categorize(self, title: str, body: str = "") -> Dict[str, any]:
+    def _build_hyperscan(self, single_words: List[List[str]]) -> None:
+        """
+        Compile every keyword into one Hyperscan database, scanned over the
+        tokens joined by " " (plain gaps) or "\\n" (any other gap). Patterns are
+        anchored at a token start (and phrases at a token end too), and phrases
+        only span " ", so the counts equal the token-based path exactly.
+        """
+        expressions: List[bytes] = []
+        # pattern id -> (category id, match count, single word?)
+        self._hs_targets: List[Tuple[int, int, bool]] = []
+        for idx, words in enumerate(single_words):
+            for word in words:
+                expressions.append(f"(?:^|[ \\n]){re.escape(word)}".encode())
+                self._hs_targets.append((idx, 1, True))
+        for candidates in self.phrase_index.values():
+            for words, idx, count in candidates:
+                phrase = " ".join(re.escape(word) for word in words)
+                expressions.append(f"(?:^|[ \\n]){phrase}(?:[ \\n]|$)".encode())
+                self._hs_targets.append((idx, count, False))
+        
+        self._hs_db = hyperscan.Database()
+        self._hs_db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(expressions),
+        )
+        # Scratch space must not be shared by concurrent scans
+        self._hs_local = threading.local()
+    
+    def _count_hyperscan(self, issue: IssueText) -> array:
+        scratch = getattr(self._hs_local, "scratch", None)
+        if scratch is None:
+            scratch = self._hs_local.scratch = hyperscan.Scratch(self._hs_db)
+        
+        counts = array("d", self._zero_counts)
+        targets = self._hs_targets
+        seen = set()
+        
+        def on_match(pattern_id, start, end, flags, context):
+            idx, count, single = targets[pattern_id]
+            if single:
+                # One hit per token and category, like a single regex match at its start
+                if (idx, start) in seen:
+                    return None
+                seen.add((idx, start))
+            counts[idx] += count
+            return None
+        
+        tokens = issue.tokens
+        joined = "".join(
+            token + (" " if plain else "\n")
+            for token, plain in zip(tokens, issue.plain_gaps)
+        ) + (tokens[-1] if tokens else "")
+        self._hs_db.scan(joined.encode(), match_event_handler=on_match, scratch=scratch)
+        return counts
+    
+    def _match_word(self, token: str) -> int:
+        """Return the id of the category with a keyword prefixing `token`, or -1."""
+        match = self.keyword_pattern.match(token)
+        return match.lastindex - 1 if match else -1
+    
+    def _count(self, issue: IssueText) -> array:
+        """Number of keyword matches, indexed by category id."""
+        if self._hs_db is not None:
+            return self._count_hyperscan(issue)
+        
+        tokens = issue.tokens
+        plain_gaps = issue.plain_gaps
+        counts = array("d", self._zero_counts)
+        match_keyword = self.keyword_pattern.match
+        
+        # One hit per token at most, like a single regex match at its start
+        for token, count in Counter(tokens).items():
+            match = match_keyword(token)
+            if match:
+                counts[match.lastindex - 1] += count
+        
+        phrase_index = self.phrase_index
+        for i, token in enumerate(tokens):
+            candidates = phrase_index.get(token)
+            if candidates:
+                for words, idx, count in candidates:
+                    # Words of a phrase must be separated by single spaces
+                    end = i + len(words)
+                    if tokens[i:end] == words and all(plain_gaps[i:end - 1]):
+                        counts[idx] += count
+        
+        return counts
+    
+    def count_keywords(self, issue: IssueText, categories: Iterable[str]) -> float:
+        """Number of keyword matches in `issue` for the given categories."""
+        counts = self._count(issue)
+        return sum(
+            counts[self.CATEGORY_NAMES.index(category)]
+            for category in categories
+            if category in self.CATEGORY_NAMES
+        )
+    
+    def _score(self, issue: IssueText) -> np.ndarray:
+        """Score = (number of matches * weight), indexed by category id."""
+        return np.frombuffer(self._count(issue), dtype=np.float64) * self.weights
+    
+    def primary_category_only(self, issue: IssueText) -> str:
+        """
+        Fast path for callers that only need the primary category.
+        Skips the sort, rounding and result-dict construction of `categorize`.
+        """
+        scores = self._score(issue)
+        best_idx = int(scores.argmax())
+        return self.CATEGORY_NAMES[best_idx] if scores[best_idx] > 0 else "general"
+    
+    def categorize(self, issue: IssueText) -> CategoryResult:
         """
         Categorize an issue based on its title and body.
         
         Args:
-            title: Issue title
-            body: Issue body/description
+            issue: Issue title + body, built with `build_issue_text`
             
         Returns:
-            {
-                "primary_category": str,
-                "categories": List[str],
-                "confidence": float,
-                "scores": Dict[str, float]
-            }
+            CategoryResult(primary_category, categories, confidence, scores);
+            use `._asdict()` where a dict is still expected
         """
-        text = f"{title} {body}".lower()
-        
-        # Calculate scores for each category
-        scores = {}
-        for category, data in self.compiled_patterns.items():
-            matches = data["pattern"].findall(text)
-            # Score = (number of matches * weight)
-            score = len(matches) * data["weight"]
-            if score > 0:
-                scores[category] = score
+        scores = self._score(issue)
+        matched = scores > 0
         
         # If no matches, default to "general"
-        if not scores:
-            return {
-                "primary_category": "general",
-                "categories": ["general"],
-                "confidence": 0.5,
-                "scores": {}
-            }
-        
-        # Sort by score
-        sorted_categories = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        primary_category = sorted_categories[0][0]
-        primary_score = sorted_categories[0][1]
+        if not matched.any():
+            return _DEFAULT
+        
+        # Sort by score (stable, so ties keep category order)
+        ranked = np.argsort(-scores, kind="stable")
+        primary_score = scores[ranked[0]]
         
         # Get all categories with significant scores (>30% of primary)
         threshold = primary_score * 0.3
-        significant_categories = [cat for cat, score in sorted_categories if score >= threshold]
+        significant = ranked[scores[ranked] >= threshold]
         
         # Calculate confidence (0-1 scale)
-        total_score = sum(scores.values())
+        total_score = scores[matched].sum()
         confidence = min(primary_score / (total_score + 1), 1.0)
         
-        return {
-            "primary_category": primary_category,
-            "categories": significant_categories,
-            "confidence": round(confidence, 2),
-            "scores": {k: round(v, 2) for k, v in scores.items()}
-        }
+        return CategoryResult(
+            primary_category=self.CATEGORY_NAMES[ranked[0]],
+            categories=tuple(self.CATEGORY_NAMES[idx] for idx in significant),
+            confidence=round(float(confidence), 2),
+            scores={
+                self.CATEGORY_NAMES[idx]: round(float(scores[idx]), 2)
+                for idx in np.flatnonzero(matched)
+            },
+        )
     
     def get_category_prefix(self, category: str) -> str:
         """
@@ -1,9 +1,125 @@
+"""
+Shared SentenceTransformer model with a two-tier embedding cache.
+
+Issue text rarely changes once indexed, so embeddings are memoised in-process
+(LRU) and persisted on disk keyed by a BLAKE2b hash of model name + text.
+Bulk callers should use `encode_many`, which encodes all misses in one
+batched forward pass.
+The model loads and warms up in a background thread started at import, so
+the first request does not pay the cold start.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+from diskcache import Cache
 from sentence_transformers import SentenceTransformer
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+MODEL_NAME = "all-MiniLM-L6-v2"
+MODEL_PATH = os.path.join(BASE_DIR, "models", MODEL_NAME)
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", os.path.join(BASE_DIR, "var", "embed_cache"))
+EMBEDDING_DIM = 384
+
+# Max texts per forward pass in encode_many
+BATCH_SIZE = 64
+
 model = None
+_model_future: Future = Future()
+_disk_cache = Cache(EMBED_CACHE_PATH)
 
-def load_model():
+
+def _load():
     global model
-    if model is None:
-        model = SentenceTransformer("models/all-MiniLM-L6-v2")
-    return model
+    try:
+        print("✅ Loading SentenceTransformer from:", MODEL_PATH)
+        loaded = SentenceTransformer(MODEL_PATH, local_files_only=True)
+        if torch.cuda.is_available():
+            loaded = loaded.half()  # fp16 doubles GPU throughput; CPU stays fp32
+        # The first forward pass pays for allocator / kernel setup
+        loaded.encode(["warmup"])
+        model = loaded
+        _model_future.set_result(loaded)
+    except BaseException as e:
+        _model_future.set_exception(e)
+
+
+threading.Thread(target=_load, name="embedding-model-warmup", daemon=True).start()
+
+
+def load_model():
+    """Return the shared model, waiting for the background load if it is still running."""
+    return _model_future.result()
+
+
+def _cache_key(text: str) -> str:
+    # "q8" keeps int8 entries apart from the float16 ones written by older builds
+    return hashlib.blake2b(f"{MODEL_NAME}|q8|{text}".encode(), digest_size=16).hexdigest()
+
+
+def _quantize(vec: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Symmetric int8 quantization with one scale per vector."""
+    scale = float(np.abs(vec).max()) / 127 or 1.0
+    return np.round(vec / scale).astype(np.int8), scale
+
+
+def _dequantize(entry: Tuple[np.ndarray, float]) -> np.ndarray:
+    q8, scale = entry
+    vec = q8.astype(np.float32) * np.float32(scale)
+    # Re-normalize so distances stay comparable with freshly encoded vectors
+    return vec / (np.linalg.norm(vec) or 1.0)
+
+
+@lru_cache(maxsize=2048)
+def embed(text: str) -> np.ndarray:
+    """
+    Return the normalized embedding for `text`, computing it only on a cache miss.
+    Vectors are stored on disk as int8 plus a scale (a quarter of float32, with
+    cosine error around 1e-3) and returned as read-only float32 arrays since
+    the LRU tier shares them.
+    """
+    key = _cache_key(text)
+    cached = _disk_cache.get(key)
+    if cached is not None:
+        vec = _dequantize(cached)
+    else:
+        vec = load_model().encode(text, normalize_embeddings=True).astype(np.float32)
+        _disk_cache[key] = _quantize(vec)
+    vec.setflags(write=False)
+    return vec
+
+
+def encode_many(texts: List[str]) -> np.ndarray:
+    """
+    Embed a list of texts, returning a (len(texts), EMBEDDING_DIM) float32 array.
+    Cached vectors are reused; all misses are encoded in one batched call.
+    """
+    if not texts:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+
+    keys = [_cache_key(text) for text in texts]
+    vectors: List[Optional[np.ndarray]] = []
+    for key in keys:
+        cached = _disk_cache.get(key)
+        vectors.append(_dequantize(cached) if cached is not None else None)
+    missing = [i for i, vec in enumerate(vectors) if vec is None]
+
+    if missing:
+        encoded = load_model().encode(
+            [texts[i] for i in missing],
+            batch_size=BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        for i, vec in zip(missing, encoded):
+            _disk_cache[keys[i]] = _quantize(vec)
+            vectors[i] = vec
+
+    return np.vstack(vectors).astype(np.float32, copy=False)
+
@@ -5,13 +5,44 @@ Supports optional source-code context for precise file-level fixes.
 """
 
 import os
-import json
+import orjson
+import asyncio
+import hashlib
 import logging
-from openai import OpenAI
+from functools import lru_cache
+import tiktoken
+from diskcache import Cache
+from openai import AsyncOpenAI
+from app.ai.categorizer import categorizer
+from app.ai.issue_text import build_issue_text
 
 logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Cap on in-flight chat completions across the app; beyond this OpenAI starts
+# answering 429 and the SDK's own backoff makes every caller slower
+openai_slots = asyncio.Semaphore(16)
+
+# ─── Response cache ───────────────────────────────────────────────────────────
+# Identical prompts (re-runs, retries, duplicate issues) reuse the stored answer.
+# Bump PROMPT_VERSION whenever the prompts or result normalization change.
+
+PROMPT_VERSION = "1"
+GPT_MODEL = "gpt-4o-mini"
+GPT_CACHE_TTL_SECONDS = 7 * 86400
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+GPT_CACHE_PATH = os.getenv("GPT_CACHE_PATH", os.path.join(BASE_DIR, "var", "gpt_cache"))
+_cache = Cache(GPT_CACHE_PATH)
+
+# ─── Code chunk budget ────────────────────────────────────────────────────────
+# Prompt tokens drive both latency and cost, so oversized chunks are cut down
+# to the lines around the issue's category keywords before they are sent.
+
+MAX_CHUNK_TOKENS = 800
+CHUNK_TOP_LINES = 3        # best-matching lines kept per chunk
+CHUNK_CONTEXT_LINES = 10   # lines kept on each side of them
 
 # ─── Base system prompt (no code context) ────────────────────────────────────
 
@@ -76,46 +107,132 @@ OUTPUT FORMAT (strict JSON):
 }"""
 
 
-def generate_with_gpt(issue_id: str, title: str, body: str, owner: str, repo: str) -> dict:
+async def generate_with_gpt(
+    issue_id: str, title: str, body: str, owner: str, repo: str, fresh: bool = False
+) -> dict:
     """
     Generate an AI solution without source-code context (original behaviour).
     File paths in this mode are NOT confirmed against real repo files.
+    fresh=True skips the response cache (the answer is still stored).
     """
-    user_message = f"""GitHub Repository: {owner}/{repo}
-
-Issue Title: {title}
-
-Issue Description:
-{body or "No description provided."}
-
-Please analyze this issue and provide a structured solution following the JSON format exactly."""
-
-    result = _call_gpt(BASE_SYSTEM_PROMPT, user_message, issue_id)
+    user_message = _base_user_message(title, body, owner, repo)
+    result = await _call_gpt(BASE_SYSTEM_PROMPT, user_message, issue_id, fresh)
     result["path_confirmed"] = False  # Path was guessed — not validated against repo
     return result
 
 
-def generate_with_code_context(
+async def submit_gpt_batch(issues: list[dict]) -> tuple[dict[str, dict], str | None]:
+    """
+    Submit solution requests for `issues` as one OpenAI batch.
+    Returns ({issue_id: solution} for prompts already cached, batch id or None
+    if every issue was cached). Poll the batch with `collect_gpt_batch`.
+    """
+    results: dict[str, dict] = {}
+    pending: dict[str, tuple[str, str]] = {}  # issue_id -> (cache key, user message)
+
+    for issue in issues:
+        issue_id = str(issue["issue_id"])
+        user_message = _base_user_message(issue["title"], issue.get("body"), issue["owner"], issue["repo"])
+        key = _cache_key(BASE_SYSTEM_PROMPT, user_message)
+        cached = _cache.get(key)
+        if cached is not None:
+            results[issue_id] = {**cached, "issue_id": issue_id, "path_confirmed": False}
+        else:
+            pending[issue_id] = (key, user_message)
+
+    if not pending:
+        return results, None
+
+    lines = [
+        orjson.dumps({
+            "custom_id": issue_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _request_body(BASE_SYSTEM_PROMPT, user_message),
+        })
+        for issue_id, (_, user_message) in pending.items()
+    ]
+    input_file = await client.files.create(
+        file=("solutions.jsonl", b"\n".join(lines)),
+        purpose="batch",
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    # Remember which cache key each answer belongs to until the batch is collected
+    _cache.set(
+        _batch_key(batch.id),
+        {issue_id: key for issue_id, (key, _) in pending.items()},
+        expire=GPT_CACHE_TTL_SECONDS,
+    )
+    logger.info(f"Submitted GPT batch {batch.id} for {len(pending)} issues")
+    return results, batch.id
+
+
+async def collect_gpt_batch(batch_id: str) -> dict[str, dict] | None:
+    """
+    Return {issue_id: solution} for a finished batch (failed requests are
+    omitted), or None while it is still running.
+    """
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status not in ("completed", "failed", "expired", "cancelled"):
+        return None
+
+    results: dict[str, dict] = {}
+    if not batch.output_file_id:
+        logger.error(f"GPT batch {batch.id} ended as {batch.status} without output")
+        return results
+
+    cache_keys = _cache.get(_batch_key(batch_id)) or {}
+    output = await client.files.content(batch.output_file_id)
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        item = orjson.loads(line)
+        issue_id = item["custom_id"]
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            logger.error(f"GPT batch request failed for issue {issue_id}: {item.get('error')}")
+            continue
+        try:
+            raw = response["body"]["choices"][0]["message"]["content"]
+            result = _normalize_solution(raw, issue_id)
+        except ValueError:
+            continue
+        if issue_id in cache_keys:
+            _cache.set(cache_keys[issue_id], result, expire=GPT_CACHE_TTL_SECONDS)
+        results[issue_id] = {**result, "path_confirmed": False}
+
+    return results
+
+
+async def generate_with_code_context(
     issue_id: str,
     title: str,
     body: str,
     owner: str,
     repo: str,
     code_chunks: list[dict],
+    fresh: bool = False,
 ) -> dict:
     """
     Generate an AI solution WITH source-code context.
     code_chunks: list of {path: str, content: str}
+    fresh: skip the response cache, e.g. when the user asked to regenerate.
     Falls back to generate_with_gpt if no chunks provided.
     """
     if not code_chunks:
         logger.info(f"No code context for issue {issue_id} — falling back to base prompt.")
-        return generate_with_gpt(issue_id, title, body, owner, repo)
+        return await generate_with_gpt(issue_id, title, body, owner, repo, fresh)
 
     # Build code context block
-    code_section = ""
-    for chunk in code_chunks:
-        code_section += f"\n\n### FILE: {chunk['path']}\n```\n{chunk['content']}\n```"
+    categories = categorizer.categorize(build_issue_text(title, body)).categories
+    code_section = "".join(
+        f"\n\n### FILE: {chunk['path']}\n```\n{_trim_chunk(chunk['content'], categories)}\n```"
+        for chunk in code_chunks
+    )
 
     user_message = f"""GitHub Repository: {owner}/{repo}
 
@@ -129,7 +246,7 @@ Issue Description:
 
 Using the source files above, identify the exact file and lines that need to change, then provide a structured solution in the required JSON format."""
 
-    result = _call_gpt(CODE_CONTEXT_SYSTEM_PROMPT, user_message, issue_id)
+    result = await _call_gpt(CODE_CONTEXT_SYSTEM_PROMPT, user_message, issue_id, fresh)
 
     # Ensure code_after is mirrored to `code` for backward compat
     if not result.get("code") and result.get("code_after"):
@@ -140,44 +257,138 @@ Using the source files above, identify the exact file and lines that need to cha
     return result
 
 
-def _call_gpt(system_prompt: str, user_message: str, issue_id: str) -> dict:
+@lru_cache(maxsize=1)
+def _encoding() -> tiktoken.Encoding:
+    return tiktoken.encoding_for_model(GPT_MODEL)
+
+
+def _trim_chunk(content: str, categories: tuple[str, ...], max_tokens: int = MAX_CHUNK_TOKENS) -> str:
+    """
+    Keep a code chunk within `max_tokens`. Longer chunks keep only the lines
+    around the ones matching the issue's category keywords (gaps marked with
+    "..."), and are then cut at the token budget.
+    """
+    encoding = _encoding()
+    tokens = encoding.encode(content)
+    if len(tokens) <= max_tokens:
+        return content
+
+    lines = content.splitlines()
+    line_scores = [categorizer.count_keywords(build_issue_text(line), categories) for line in lines]
+    top = sorted(
+        (i for i, score in enumerate(line_scores) if score > 0),
+        key=lambda i: line_scores[i],
+        reverse=True,
+    )[:CHUNK_TOP_LINES]
+
+    if top:
+        keep = sorted({
+            i
+            for line_no in top
+            for i in range(max(0, line_no - CHUNK_CONTEXT_LINES), min(len(lines), line_no + CHUNK_CONTEXT_LINES + 1))
+        })
+        parts = []
+        prev = -1
+        for i in keep:
+            if i != prev + 1:
+                parts.append("...")
+            parts.append(lines[i])
+            prev = i
+        if prev != len(lines) - 1:
+            parts.append("...")
+        content = "\n".join(parts)
+        tokens = encoding.encode(content)
+        if len(tokens) <= max_tokens:
+            return content
+
+    return encoding.decode(tokens[:max_tokens]) + "\n\n... (truncated)"
+
+
+def _base_user_message(title: str, body: str, owner: str, repo: str) -> str:
+    return f"""GitHub Repository: {owner}/{repo}
+
+Issue Title: {title}
+
+Issue Description:
+{body or "No description provided."}
+
+Please analyze this issue and provide a structured solution following the JSON format exactly."""
+
+
+def _cache_key(system_prompt: str, user_message: str) -> str:
+    raw = f"{PROMPT_VERSION}|{GPT_MODEL}|{system_prompt}|{user_message}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _batch_key(batch_id: str) -> str:
+    return f"batch:{batch_id}"
+
+
+async def _call_gpt(system_prompt: str, user_message: str, issue_id: str, fresh: bool = False) -> dict:
+    """
+    Cached wrapper around `_request_gpt`, keyed by prompt version + prompt text.
+    fresh=True always asks GPT and replaces the cached answer.
+    """
+    key = _cache_key(system_prompt, user_message)
+    cached = None if fresh else _cache.get(key)
+    if cached is not None:
+        logger.info(f"GPT cache hit for issue {issue_id}")
+        return {**cached, "issue_id": issue_id}
+
+    result = await _request_gpt(system_prompt, user_message, issue_id)
+    _cache.set(key, result, expire=GPT_CACHE_TTL_SECONDS)
+    return result
+
+
+def _request_body(system_prompt: str, user_message: str) -> dict:
+    """Chat-completions parameters shared by direct and batch calls."""
+    return {
+        "model": GPT_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_message}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 1800,
+        "response_format": {"type": "json_object"},
+    }
+
+
+async def _request_gpt(system_prompt: str, user_message: str, issue_id: str) -> dict:
     """Shared GPT call with JSON parsing and normalization."""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.3,
-            max_tokens=1800,
-            response_format={"type": "json_object"}
-        )
-
-        raw = response.choices[0].message.content
-        solution = json.loads(raw)
-
-        is_code = bool(solution.get("is_code_fix", False))
-
-        return {
-            "issue_id": issue_id,
-            "summary": solution.get("summary", "No summary available."),
-            "is_code_fix": is_code,
-            "steps": solution.get("steps", []),
-            # Code context fields
-            "file_path": solution.get("file_path", "") if is_code else "",
-            "code_before": solution.get("code_before", "") if is_code else "",
-            "code_after": solution.get("code_after", "") if is_code else "",
-            # Legacy / fallback fields
-            "code": solution.get("code", solution.get("code_after", "")) if is_code else "",
-            "code_language": solution.get("code_language", "") if is_code else "",
-            "code_explanation": solution.get("code_explanation", "") if is_code else "",
-            "generated_by": "gpt-4o-mini"
-        }
-
-    except json.JSONDecodeError as e:
-        logger.error(f"GPT returned invalid JSON for issue {issue_id}: {e}")
-        raise ValueError("GPT returned invalid JSON. Please try again.")
+        async with openai_slots:
+            response = await client.chat.completions.create(**_request_body(system_prompt, user_message))
+        return _normalize_solution(response.choices[0].message.content, issue_id)
+    except ValueError:
+        raise
     except Exception as e:
         logger.error(f"GPT generation failed for issue {issue_id}: {e}")
         raise
+
+
+def _normalize_solution(raw: str, issue_id: str) -> dict:
+    """Parse GPT's JSON reply into the solution fields the API exposes."""
+    try:
+        solution = orjson.loads(raw)
+    except orjson.JSONDecodeError as e:
+        logger.error(f"GPT returned invalid JSON for issue {issue_id}: {e}")
+        raise ValueError("GPT returned invalid JSON. Please try again.")
+
+    is_code = bool(solution.get("is_code_fix", False))
+
+    return {
+        "issue_id": issue_id,
+        "summary": solution.get("summary", "No summary available."),
+        "is_code_fix": is_code,
+        "steps": solution.get("steps", []),
+        # Code context fields
+        "file_path": solution.get("file_path", "") if is_code else "",
+        "code_before": solution.get("code_before", "") if is_code else "",
+        "code_after": solution.get("code_after", "") if is_code else "",
+        # Legacy / fallback fields
+        "code": solution.get("code", solution.get("code_after", "")) if is_code else "",
+        "code_language": solution.get("code_language", "") if is_code else "",
+        "code_explanation": solution.get("code_explanation", "") if is_code else "",
+        "generated_by": GPT_MODEL
+    }
@@ -0,0 +1,37 @@
+"""
+Normalized issue text shared by the rule-based classifiers.
+
+`title + body` is joined, lowercased and tokenized once per issue, and the
+result is passed to the categorizer and the solution pattern detector.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Tuple
+
+# Word tokens, keeping contractions like "doesn't" / "won't" intact
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*")
+
+
+@dataclass(slots=True, frozen=True)
+class IssueText:
+    raw: str
+    lower: str
+    tokens: Tuple[str, ...]
+    # plain_gaps[i]: tokens i and i+1 are separated by exactly one space, so a
+    # keyword phrase may span them (not across punctuation or line breaks)
+    plain_gaps: Tuple[bool, ...]
+
+
+def build_issue_text(title: str, body: str = "") -> IssueText:
+    """Build the IssueText for an issue (body may be None)."""
+    raw = f"{title} {body or ''}"
+    lower = raw.lower()
+    # split() yields the text around tokens: [before first, gap, ..., gap, after last]
+    gaps = TOKEN_PATTERN.split(lower)[1:-1]
+    return IssueText(
+        raw=raw,
+        lower=lower,
+        tokens=tuple(TOKEN_PATTERN.findall(lower)),
+        plain_gaps=tuple(gap == " " for gap in gaps),
+    )
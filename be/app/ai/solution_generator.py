@@ -1,44 +1,51 @@
+import re
+
+import ahocorasick
+
+from app.ai.issue_text import IssueText, build_issue_text
 from app.ai.patterns import SECURITY_PATTERNS, CRASH_PATTERNS, GENERIC_FIX
 from app.ai.solution_memory import store_solution
 from app.db.mongo import solution_memory
 
+# Every line boundary str.splitlines() recognises (\r\n, \r, \v, \x85, ...)
+_LINE_BREAKS = re.compile(r"\r\n|[\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
 
-def extract_code_blocks(text: str):
-    if not text:
-        return []
-
-    blocks = []
-    inside = False
-    current = []
-
-    for line in text.splitlines():
-        if line.strip().startswith("```"):
-            if inside:
-                blocks.append("\n".join(current))
-                current = []
-                inside = False
-            else:
-                inside = True
-            continue
+# A fenced block: an (optionally indented) ``` line, its body, then the next ``` line
+_FENCE_PATTERN = re.compile(
+    r"^[^\S\n]*```[^\n]*\n(.*?)\n?^[^\S\n]*```",
+    re.DOTALL | re.MULTILINE,
+)
 
-        if inside:
-            current.append(line)
+# One automaton over every known pattern key. Values carry the key's rank
+# (security keys first, then crash keys, in dict order) so the earliest-ranked
+# key present wins regardless of where it appears in the text.
+_PATTERN_AUTOMATON = ahocorasick.Automaton()
+for _rank, (_key, _pattern) in enumerate(
+    [*SECURITY_PATTERNS.items(), *CRASH_PATTERNS.items()]
+):
+    if _key not in _PATTERN_AUTOMATON:
+        _PATTERN_AUTOMATON.add_word(_key, (_rank, _pattern))
+_PATTERN_AUTOMATON.make_automaton()
 
-    return blocks
 
+def extract_code_blocks(text: str):
+    r"""
+    Bodies of the fenced code blocks in `text`, with lines joined by "\n".
+    Line breaks are normalised first, so CRLF issue bodies split like LF ones:
 
-def detect_pattern(title: str, body: str):
-    text = f"{title} {body}".lower()
+    >>> extract_code_blocks("text\r\n```py\r\nfoo\r\nfoo\r\n```\r\n")
+    ['foo\nfoo']
+    """
+    if not text:
+        return []
 
-    for key, pattern in SECURITY_PATTERNS.items():
-        if key in text:
-            return pattern
+    return _FENCE_PATTERN.findall(_LINE_BREAKS.sub("\n", text))
 
-    for key, pattern in CRASH_PATTERNS.items():
-        if key in text:
-            return pattern
 
-    return None
+def detect_pattern(issue: IssueText):
+    matches = (match for _, match in _PATTERN_AUTOMATON.iter(issue.lower))
+    best = min(matches, key=lambda match: match[0], default=None)
+    return best[1] if best else None
 
 
 def generate_solution(issue: dict, similar_issues: list):
@@ -54,7 +61,7 @@ def generate_solution(issue: dict, similar_issues: list):
     }
 
     # 1️⃣ Pattern-based solution
-    pattern = detect_pattern(title, body)
+    pattern = detect_pattern(build_issue_text(title, body))
     if pattern:
         solution["summary"] = pattern.get(
             "title", "Detected known issue pattern"
@@ -1,9 +1,98 @@
-from datetime import datetime
+import atexit
+import copy
+import logging
+import threading
+from datetime import datetime, timezone
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Learned solutions are buffered and written with one insert_many per batch
+# instead of an insert_one round-trip per solution.
+FLUSH_SIZE = 64
+FLUSH_INTERVAL_SECONDS = 0.5
+# Solutions kept for retry while Mongo is unreachable; the oldest go first
+MAX_BUFFERED = 10_000
+
+_BUFFER: list[dict] = []
+_LOCK = threading.Lock()
+_collection = None
+_timer = None
+
 
 def store_solution(memory_collection, issue, solution):
-    memory_collection.insert_one({
+    global _collection
+    doc = {
         "issue_title": issue["title"],
-        "solution": solution,
+        # Snapshot now: the caller may keep mutating its dict before we flush
+        "solution": copy.deepcopy(solution),
         "confidence": solution.get("confidence", 0),
-        "created_at": datetime.utcnow(),
-    })
+        "created_at": datetime.now(timezone.utc),
+    }
+    batches = []
+    with _LOCK:
+        if _collection is not None and _collection is not memory_collection:
+            batches.append(_take_locked())
+        _collection = memory_collection
+        _BUFFER.append(doc)
+        if len(_BUFFER) >= FLUSH_SIZE:
+            batches.append(_take_locked())
+        else:
+            _schedule_locked()
+    # Written outside the lock, so other callers never wait on the network
+    for collection, docs in batches:
+        _write(collection, docs)
+
+
+def flush():
+    """Write any buffered solutions now."""
+    with _LOCK:
+        collection, docs = _take_locked()
+    _write(collection, docs)
+
+
+def _schedule_locked():
+    global _timer
+    if _timer is None:
+        _timer = threading.Timer(FLUSH_INTERVAL_SECONDS, flush)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _take_locked():
+    """Empty the buffer, returning (collection, docs) for `_write`."""
+    global _timer
+    if _timer is not None:
+        _timer.cancel()
+        _timer = None
+    docs = _BUFFER[:]
+    _BUFFER.clear()
+    return _collection, docs
+
+
+def _write(collection, docs):
+    """insert_many that logs failures; connection errors put the docs back for a retry."""
+    if not docs:
+        return
+    try:
+        collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # Per-document errors (including duplicates of an earlier partial write) won't pass on retry
+        logger.error(f"Storing {len(docs)} learned solutions: {len(e.details.get('writeErrors', []))} failed")
+    except PyMongoError as e:
+        # insert_many gave each doc its _id, so a retry cannot store one twice
+        logger.error(f"Storing {len(docs)} learned solutions failed, will retry: {e}")
+        with _LOCK:
+            if _collection is not collection:
+                logger.error(f"Dropped {len(docs)} learned solutions for a replaced collection")
+                return
+            _BUFFER[:0] = docs
+            overflow = len(_BUFFER) - MAX_BUFFERED
+            if overflow > 0:
+                del _BUFFER[:overflow]
+                logger.error(f"Dropped the {overflow} oldest unsaved learned solutions")
+            _schedule_locked()
+
+
+atexit.register(flush)
@@ -3,23 +3,115 @@ AI Features API — Auto-label suggestions, priority scoring, release notes, ass
 
 POST /api/ai/suggest-labels                              — suggests GitHub labels using rules + OpenAI
 GET  /api/ai/priority-score/{owner}/{repo}/{issue_number} — 0-100 score
+POST /api/ai/priority-score/batch                        — 0-100 scores for many issues
 GET  /api/ai/milestones/{owner}/{repo}                   — list GitHub milestones
 POST /api/ai/release-notes                               — GPT-generated release notes for a milestone
 GET  /api/ai/suggest-assignees/{owner}/{repo}/{issue_number} — top committers for related files
+POST /api/ai/batch/analyze-repo                          — queue GPT solutions for all open issues (Batch API)
+GET  /api/ai/batch/{owner}/{repo}/{batch_id}             — store the batch's solutions once it finishes
 """
 
 import os
+import re
+import time
+import asyncio
+import calendar
+import hashlib
 import logging
+import ahocorasick
+import httpx
+import numpy as np
+from cachetools import LRUCache, TTLCache
+from datetime import datetime, timezone
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
+from pymongo import UpdateOne
+from tenacity import retry, retry_if_exception_type, retry_if_result, stop_after_attempt, wait_exponential
 from typing import Optional
-from app.db.mongo import cached_repositories, cached_issues
-from openai import AsyncOpenAI
+from app.ai.gpt_solution_generator import client, openai_slots, submit_gpt_batch, collect_gpt_batch
+from app.db.mongo import cached_repositories, cached_issues, solutions
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/ai", tags=["AI Features"])
 
-client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Shared GitHub HTTP client; closed on app shutdown (see main.lifespan)
+_http = httpx.AsyncClient(http2=True, timeout=15, headers={"Accept": "application/vnd.github.v3+json"})
+
+
+# Cap on concurrent GitHub requests, to stay under GitHub's secondary rate limits
+_github_slots = asyncio.Semaphore(8)
+
+# Throttled or failed replies worth another try; 403 is left alone since it
+# also means "no access" and the secondary limit is kept at bay by the slots
+_RETRY_STATUSES = {429, 502, 503, 504}
+
+
+async def close_http_client():
+    await _http.aclose()
+
+
+@retry(
+    wait=wait_exponential(multiplier=0.5, max=8),
+    stop=stop_after_attempt(3),
+    retry=retry_if_exception_type(httpx.TransportError)
+    | retry_if_result(lambda res: res.status_code in _RETRY_STATUSES),
+    # Out of attempts: hand back the last response and let the caller handle the status
+    retry_error_callback=lambda state: state.outcome.result(),
+)
+async def _limited_get(url: str, **kwargs) -> httpx.Response:
+    """Every GitHub GET goes through here: slot-limited, retried with backoff outside the slot."""
+    async with _github_slots:
+        return await _http.get(url, **kwargs)
+
+
+# Conditional GETs: a 304 reply doesn't count against the GitHub rate limit.
+# (url, params, token hash) -> (etag, body, headers needed to rebuild the response)
+_etag_cache: LRUCache = LRUCache(maxsize=2048)
+
+
+async def _conditional_get(url: str, headers: dict, params: Optional[dict] = None) -> httpx.Response:
+    """GET with If-None-Match; a 304 is answered from the cached 200 response."""
+    auth = hashlib.blake2b(headers.get("Authorization", "").encode(), digest_size=8).digest()
+    key = (url, tuple(sorted((params or {}).items())), auth)
+    cached = _etag_cache.get(key)
+    if cached:
+        headers = {**headers, "If-None-Match": cached[0]}
+
+    res = await _limited_get(url, headers=headers, params=params)
+    if res.status_code == 304 and cached:
+        return httpx.Response(200, content=cached[1], headers=cached[2], request=res.request)
+    if res.status_code == 200 and "ETag" in res.headers:
+        kept = {k: res.headers[k] for k in ("Content-Type", "Link") if k in res.headers}
+        _etag_cache[key] = (res.headers["ETag"], res.content, kept)
+    return res
+
+# (owner, repo) -> cached_repositories _id. Repo docs are only ever created
+# once and deleted; deletion calls forget_repo_id, other workers expire in an hour.
+_REPO_ID_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=3600)
+
+
+async def _find_repo_id(owner: str, repo: str):
+    """_id of the cached repository, or None when it has not been analyzed."""
+    key = (owner, repo)
+    repo_id = _REPO_ID_CACHE.get(key)
+    if repo_id is None:
+        repo_doc = await cached_repositories.find_one({"owner": owner, "name": repo}, {"_id": 1})
+        if not repo_doc:
+            return None
+        repo_id = _REPO_ID_CACHE[key] = repo_doc["_id"]
+    return repo_id
+
+
+async def _repo_id(owner: str, repo: str, detail: str = "Repository not found in cache"):
+    repo_id = await _find_repo_id(owner, repo)
+    if repo_id is None:
+        raise HTTPException(status_code=404, detail=detail)
+    return repo_id
+
+
+def forget_repo_id(owner: str, repo: str) -> None:
+    _REPO_ID_CACHE.pop((owner, repo), None)
+
 
 # ── Label keyword rules (free, no API call) ─────────────────────────────────
 LABEL_RULES = {
@@ -36,13 +128,42 @@ LABEL_RULES = {
 }
 
 
-def rule_based_labels(title: str, body: str) -> list[str]:
+# All rule keywords in one automaton: keyword -> (keyword, ids of the labels it implies)
+_LABEL_NAMES = tuple(LABEL_RULES)
+_LABEL_AUTOMATON = ahocorasick.Automaton()
+for _label_id, _label_keywords in enumerate(LABEL_RULES.values()):
+    for _kw in _label_keywords:
+        _, _ids = _LABEL_AUTOMATON.get(_kw, (_kw, ()))
+        _LABEL_AUTOMATON.add_word(_kw, (_kw, (*_ids, _label_id)))
+_LABEL_AUTOMATON.make_automaton()
+
+# Rules alone are trusted when they give this many labels, with at least
+# one label backed by this many distinct keywords
+RULES_CONFIDENT_LABELS = 3
+RULES_CONFIDENT_HITS = 2
+
+
+def _rule_label_hits(title: str, body: str) -> dict[int, set[str]]:
+    """Label id -> distinct rule keywords found in the issue text."""
     text = (title + " " + body).lower()
-    matched = []
-    for label, keywords in LABEL_RULES.items():
-        if any(kw in text for kw in keywords):
-            matched.append(label)
-    return matched[:5]
+    hits: dict[int, set[str]] = {}
+    for _, (kw, label_ids) in _LABEL_AUTOMATON.iter(text):
+        for label_id in label_ids:
+            hits.setdefault(label_id, set()).add(kw)
+    return hits
+
+
+def _labels_from_hits(hits: dict[int, set[str]]) -> list[str]:
+    return [_LABEL_NAMES[i] for i in sorted(hits)][:5]
+
+
+def rule_based_labels(title: str, body: str) -> list[str]:
+    return _labels_from_hits(_rule_label_hits(title, body))
+
+
+# GPT label suggestions by normalized title + body prefix, so duplicate
+# issues don't re-query OpenAI
+_AI_LABEL_CACHE: LRUCache = LRUCache(maxsize=4096)
 
 
 # ────────────────────────────────────────────────────────────────────────────
@@ -61,10 +182,22 @@ async def suggest_labels(req: LabelRequest):
     1. Rule-based matching (instant, free)
     2. OpenAI refinement if env key is set
     """
-    rule_labels = rule_based_labels(req.title, req.body or "")
+    hits = _rule_label_hits(req.title, req.body or "")
+    rule_labels = _labels_from_hits(hits)
+
+    # Confident rule matches skip the GPT round trip entirely
+    if (len(rule_labels) >= RULES_CONFIDENT_LABELS
+            and max(len(kws) for kws in hits.values()) >= RULES_CONFIDENT_HITS):
+        return {"suggested_labels": rule_labels, "source": "rules"}
 
     ai_labels: list[str] = []
-    if os.getenv("OPENAI_API_KEY"):
+    label_key = hashlib.blake2b(
+        f"{req.title.strip().lower()}|{(req.body or '')[:600].strip().lower()}".encode(),
+        digest_size=16,
+    ).digest()
+    if label_key in _AI_LABEL_CACHE:
+        ai_labels = _AI_LABEL_CACHE[label_key]
+    elif os.getenv("OPENAI_API_KEY"):
         try:
             prompt = (
                 "You are a GitHub project maintainer. Given the following issue, "
@@ -73,14 +206,16 @@ async def suggest_labels(req: LabelRequest):
                 f"Title: {req.title}\n"
                 f"Body: {(req.body or '')[:600]}"
             )
-            resp = await client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=60,
-                temperature=0.3,
-            )
+            async with openai_slots:
+                resp = await client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=60,
+                    temperature=0.3,
+                )
             raw = resp.choices[0].message.content or ""
             ai_labels = [l.strip().lower() for l in raw.split(",") if l.strip()][:5]
+            _AI_LABEL_CACHE[label_key] = ai_labels
         except Exception as e:
             logger.warning(f"OpenAI label suggestion failed: {e}")
 
@@ -108,6 +243,36 @@ PRIORITY_LABELS = [
     (0,  "P3 Low",      "🟢"),
 ]
 
+# Per-issue results for dashboard reloads. Keys include the issue's GitHub
+# update time and last sync, so a changed or re-analyzed issue misses.
+_PRIORITY_CACHE: TTLCache = TTLCache(maxsize=50_000, ttl=300)
+_SIMILAR_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+
+
+def _created_ts(issue: dict) -> Optional[int]:
+    """Creation time as epoch seconds (derived from created_at for issues cached before created_ts)."""
+    created_ts = issue.get("created_ts")
+    if created_ts is None and issue.get("created_at"):
+        # Mongo hands back naive UTC datetimes; utctimetuple() reads those as UTC
+        created_ts = calendar.timegm(issue["created_at"].utctimetuple())
+    return created_ts
+
+
+def _issue_cache_key(issue: dict) -> tuple:
+    return (issue["repository_id"], issue["number"], issue.get("updated_at"), issue.get("synced_at"))
+
+
+# Projections: only the fields each endpoint reads (plus the cache-key fields)
+_CACHE_KEY_FIELDS = {"_id": 0, "repository_id": 1, "number": 1, "updated_at": 1, "synced_at": 1}
+_SIMILAR_FIELDS = {
+    **_CACHE_KEY_FIELDS, "title": 1, "body": 1,
+    "ai_analysis.similar_issues": 1, "duplicate_info.similar_issues": 1,
+}
+_PRIORITY_FIELDS = {
+    **_CACHE_KEY_FIELDS, "state": 1, "created_ts": 1, "created_at": 1,
+    "reactions": 1, "comments": 1, "ai_analysis.criticality": 1, "ai_analysis.type": 1,
+}
+
 
 @router.get("/similar-issues/{owner}/{repo}/{issue_number}")
 async def get_similar_issues(owner: str, repo: str, issue_number: int):
@@ -116,17 +281,20 @@ async def get_similar_issues(owner: str, repo: str, issue_number: int):
     Looks in both ai_analysis.similar_issues and duplicate_info.similar_issues.
     Handles field-name variations (number vs issue_number).
     """
-    repo_doc = await cached_repositories.find_one({"owner": owner, "name": repo})
-    if not repo_doc:
-        raise HTTPException(status_code=404, detail="Repository not found in cache")
-
-    issue = await cached_issues.find_one({
-        "repository_id": repo_doc["_id"],
-        "number": issue_number
-    })
+    repo_id = await _repo_id(owner, repo)
+
+    issue = await cached_issues.find_one(
+        {"repository_id": repo_id, "number": issue_number},
+        _SIMILAR_FIELDS,
+    )
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found in cache")
 
+    cache_key = _issue_cache_key(issue)
+    cached = _SIMILAR_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
     # Try both storage locations — ai_analysis first, then duplicate_info
     raw_similar = (
         issue.get("ai_analysis", {}).get("similar_issues")
@@ -153,22 +321,28 @@ async def get_similar_issues(owner: str, repo: str, issue_number: int):
             logger.warning(f"Live similarity fallback failed for #{issue_number}: {e}")
             raw_similar = []
 
-    # Enrich each similar-issue reference with full cached data
-    enriched = []
+    # Resolve each similar-issue reference to its issue number
+    refs = []
     for s in raw_similar:
         # Accept both 'number' and 'issue_number' field variants
         num = s.get("number") or s.get("issue_number")
         if num is None:
             continue
         try:
-            num = int(num)
+            refs.append((int(num), s))
         except (TypeError, ValueError):
             continue
 
-        full = await cached_issues.find_one({
-            "repository_id": repo_doc["_id"],
-            "number": num
-        })
+    # Enrich with full cached data, fetched in one query
+    docs = await cached_issues.find(
+        {"repository_id": repo_id, "number": {"$in": [num for num, _ in refs]}},
+        {"_id": 0, "number": 1, "title": 1, "state": 1},
+    ).to_list(length=None)
+    by_number = {d["number"]: d for d in docs}
+
+    enriched = []
+    for num, s in refs:
+        full = by_number.get(num)
         enriched.append({
             "number": num,
             # Prefer full doc title, fall back to what's stored in the similar_issues dict
@@ -180,9 +354,82 @@ async def get_similar_issues(owner: str, repo: str, issue_number: int):
     # Sort by similarity descending
     enriched.sort(key=lambda x: x["similarity"], reverse=True)
 
-    return {"similar_issues": enriched, "count": len(enriched)}
+    result = {"similar_issues": enriched, "count": len(enriched)}
+    _SIMILAR_CACHE[cache_key] = result
+    return result
+
+
+
+# Lookup tables for column-wise scoring: code -> points (last code = unknown)
+_CRITICALITY_CODES = {name: code for code, name in enumerate(CRITICALITY_SCORE)}
+_CRITICALITY_POINTS = np.array([*CRITICALITY_SCORE.values(), 5], dtype=np.int64)
+_TYPE_CODES = {name: code for code, name in enumerate(TYPE_BONUS)}
+_TYPE_POINTS = np.array([*TYPE_BONUS.values(), 0], dtype=np.int64)
+# np.digitize bins in ascending order; bin i -> PRIORITY_LABELS[-1 - i]
+_PRIORITY_BINS = np.array(sorted(t for t, _, _ in PRIORITY_LABELS)[1:], dtype=np.int64)
 
 
+def _reaction_counts(reactions) -> tuple[int, int]:
+    """(weighted reaction total, +1 count) from a GitHub reactions dict."""
+    if not isinstance(reactions, dict):
+        return 0, 0
+    plus_one = reactions.get("+1", 0)
+    total = sum(
+        v for k, v in reactions.items()
+        if k not in ("+1", "url") and isinstance(v, int)
+    ) + plus_one
+    return total, plus_one
+
+
+def _priority_scores(issues: list[dict]) -> list[dict]:
+    """
+    0-100 priority score, label and breakdown for each cached issue, based on
+    criticality, type, reactions, comment count and age. Computed over NumPy
+    columns so batches cost one vectorized pass.
+    """
+    analyses = [issue.get("ai_analysis") or {} for issue in issues]
+    criticality = _CRITICALITY_POINTS[np.array([
+        _CRITICALITY_CODES.get((a.get("criticality") or "low").lower(), len(_CRITICALITY_CODES))
+        for a in analyses
+    ], dtype=np.int8)]
+    type_bonus = _TYPE_POINTS[np.array([
+        _TYPE_CODES.get((a.get("type") or "unknown").lower(), len(_TYPE_CODES))
+        for a in analyses
+    ], dtype=np.int8)]
+
+    reactions = np.array([_reaction_counts(issue.get("reactions", {})) for issue in issues], dtype=np.int64).reshape(-1, 2)
+    comments = np.minimum(np.array([issue.get("comments") or 0 for issue in issues], dtype=np.int64), 15)
+
+    # Age bonus for open issues (max +10 for > 30 days)
+    created = [_created_ts(issue) if issue.get("state") == "open" else None for issue in issues]
+    created_ts = np.array([ts or 0 for ts in created], dtype=np.int64)
+    age_days = (int(time.time()) - created_ts) // 86400
+    age_bonus = np.where([ts is not None for ts in created], np.minimum(age_days // 3, 10), 0)
+
+    scores = np.minimum(
+        criticality + type_bonus + np.minimum(reactions[:, 0] * 2, 20) + comments + age_bonus,
+        100,
+    )
+    bins = np.digitize(scores, _PRIORITY_BINS)
+
+    return [
+        {
+            "score": score,
+            "label": PRIORITY_LABELS[-1 - b][1],
+            "emoji": PRIORITY_LABELS[-1 - b][2],
+            "breakdown": {
+                "criticality": crit,
+                "type_bonus": bonus,
+                "reactions": min(plus_one * 2, 20),
+                "comments": comment_points,
+            },
+        }
+        for score, b, crit, bonus, plus_one, comment_points in zip(
+            scores.tolist(), bins.tolist(), criticality.tolist(), type_bonus.tolist(),
+            reactions[:, 1].tolist(), comments.tolist(),
+        )
+    ]
+
 
 @router.get("/priority-score/{owner}/{repo}/{issue_number}")
 async def get_priority_score(owner: str, repo: str, issue_number: int):
@@ -190,80 +437,59 @@ async def get_priority_score(owner: str, repo: str, issue_number: int):
     Return a 0-100 priority score based on criticality, type, reactions,
     comment count, and issue age.
     """
-    repo_doc = await cached_repositories.find_one({"owner": owner, "name": repo})
-    if not repo_doc:
-        raise HTTPException(status_code=404, detail="Repository not found in cache")
-
-    issue = await cached_issues.find_one({
-        "repository_id": repo_doc["_id"],
-        "number": issue_number
-    })
+    repo_id = await _repo_id(owner, repo)
+
+    issue = await cached_issues.find_one(
+        {"repository_id": repo_id, "number": issue_number},
+        _PRIORITY_FIELDS,
+    )
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found in cache")
 
-    analysis = issue.get("ai_analysis", {})
-    score = 0
+    cache_key = _issue_cache_key(issue)
+    cached = _PRIORITY_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
 
-    # Criticality weight
-    criticality = (analysis.get("criticality") or "low").lower()
-    score += CRITICALITY_SCORE.get(criticality, 5)
+    result = _priority_scores([issue])[0]
+    _PRIORITY_CACHE[cache_key] = result
+    return result
 
-    # Type bonus
-    issue_type = (analysis.get("type") or "unknown").lower()
-    score += TYPE_BONUS.get(issue_type, 0)
 
-    # Reactions
-    reactions = issue.get("reactions", {})
-    if isinstance(reactions, dict):
-        reaction_total = sum(
-            v for k, v in reactions.items()
-            if k not in ("+1", "url") and isinstance(v, int)
-        ) + reactions.get("+1", 0)
-        score += min(reaction_total * 2, 20)
+class PriorityBatchRequest(BaseModel):
+    owner: str
+    repo: str
+    issue_numbers: list[int]
 
-    # Comment count
-    comments = issue.get("comments", 0)
-    score += min(comments, 15)
 
-    # Age bonus for open issues (max +10 for > 30 days)
-    from datetime import datetime
-    if issue.get("state") == "open":
-        created = issue.get("created_at")
-        if created:
-            now = datetime.utcnow()
-            if hasattr(created, 'tzinfo') and created.tzinfo is not None:
-                created = created.replace(tzinfo=None)
-            age_days = (now - created).days
-            score += min(age_days // 3, 10)
-
-    score = min(score, 100)
-
-    # Determine label
-    label, emoji = "P3 Low", "🟢"
-    for threshold, lbl, emj in PRIORITY_LABELS:
-        if score >= threshold:
-            label, emoji = lbl, emj
-            break
-
-    return {
-        "score": score,
-        "label": label,
-        "emoji": emoji,
-        "breakdown": {
-            "criticality": CRITICALITY_SCORE.get(criticality, 5),
-            "type_bonus": TYPE_BONUS.get(issue_type, 0),
-            "reactions": min(reactions.get("+1", 0) * 2 if isinstance(reactions, dict) else 0, 20),
-            "comments": min(comments, 15),
-        }
-    }
+@router.post("/priority-score/batch")
+async def get_priority_scores(req: PriorityBatchRequest):
+    """
+    Priority scores for many issues at once: one Mongo query and one
+    vectorized scoring pass. Issues missing from the cache are listed
+    under "missing".
+    """
+    repo_id = await _repo_id(req.owner, req.repo)
+
+    docs = await cached_issues.find(
+        {"repository_id": repo_id, "number": {"$in": req.issue_numbers}},
+        _PRIORITY_FIELDS,
+    ).to_list(length=None)
+    by_number = {doc["number"]: doc for doc in docs}
+
+    found = [by_number[n] for n in dict.fromkeys(req.issue_numbers) if n in by_number]
+    scores = [
+        {"number": doc["number"], **result}
+        for doc, result in zip(found, _priority_scores(found))
+    ]
+    missing = [n for n in dict.fromkeys(req.issue_numbers) if n not in by_number]
+    return {"scores": scores, "count": len(scores), "missing": missing}
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Milestones — GET /api/ai/milestones/{owner}/{repo}
 # ─────────────────────────────────────────────────────────────────────────────
 
-import requests as _req
-
 @router.get("/milestones/{owner}/{repo}")
 async def get_milestones(owner: str, repo: str, user_token: Optional[str] = None):
     """
@@ -276,7 +502,7 @@ async def get_milestones(owner: str, repo: str, user_token: Optional[str] = None
 
     url = f"https://api.github.com/repos/{owner}/{repo}/milestones"
     try:
-        res = _req.get(url, headers=headers, params={"state": "all", "per_page": 50})
+        res = await _conditional_get(url, headers, {"state": "all", "per_page": 50})
         if res.status_code == 404:
             raise HTTPException(status_code=404, detail="Repository not found or no milestones")
         res.raise_for_status()
@@ -336,11 +562,8 @@ Rules:
 """
 
 
-@router.post("/release-notes")
-async def generate_release_notes(req: ReleaseNotesRequest):
-    """
-    Fetch all closed issues for a milestone and generate structured release notes via GPT.
-    """
+async def _milestone_issues(req: ReleaseNotesRequest) -> tuple[str, list[dict]]:
+    """Return the milestone title and all of its closed issues (PRs excluded)."""
     from app.utils.github_fetcher import github_fetcher
     headers = github_fetcher.headers.copy()
     if req.user_token:
@@ -348,30 +571,48 @@ async def generate_release_notes(req: ReleaseNotesRequest):
 
     # 1. Fetch milestone details for the title
     ms_url = f"https://api.github.com/repos/{req.owner}/{req.repo}/milestones/{req.milestone_number}"
-    ms_res = _req.get(ms_url, headers=headers)
+    ms_res = await _conditional_get(ms_url, headers)
     if ms_res.status_code != 200:
         raise HTTPException(status_code=404, detail="Milestone not found")
     milestone = ms_res.json()
     milestone_title = milestone.get("title", f"v{req.milestone_number}")
 
-    # 2. Fetch all closed issues in this milestone (paginated)
+    # 2. Fetch all closed issues in this milestone (paginated). Page 1's Link
+    #    header names the last page, so the rest are fetched concurrently.
+    url = f"https://api.github.com/repos/{req.owner}/{req.repo}/issues"
+    params = {"milestone": req.milestone_number, "state": "closed", "per_page": 100}
+    first = await _conditional_get(url, headers, {**params, "page": 1})
+    pages = [first]
+    last_url = first.links.get("last", {}).get("url") if first.status_code == 200 else None
+    if last_url:
+        last_page = int(httpx.URL(last_url).params.get("page", 1))
+        pages += await asyncio.gather(*(
+            _conditional_get(url, headers, {**params, "page": page})
+            for page in range(2, last_page + 1)
+        ))
+
     issues = []
-    page = 1
-    while True:
-        url = f"https://api.github.com/repos/{req.owner}/{req.repo}/issues"
-        res = _req.get(url, headers=headers, params={
-            "milestone": req.milestone_number,
-            "state": "closed",
-            "per_page": 100,
-            "page": page,
-        })
+    for res in pages:
         if res.status_code != 200:
             break
-        batch = [i for i in res.json() if "pull_request" not in i]
-        issues.extend(batch)
-        if len(res.json()) < 100:
-            break
-        page += 1
+        issues.extend(i for i in res.json() if "pull_request" not in i)
+    return milestone_title, issues
+
+
+def _release_notes_user_msg(milestone_title: str, issues: list[dict]) -> str:
+    issue_lines = "\n".join(
+        f"#{i['number']}: {i['title']} [labels: {', '.join(l['name'] for l in i.get('labels', []))}]"
+        for i in issues[:80]   # cap at 80 to stay within token budget
+    )
+    return f"Milestone: {milestone_title}\n\nClosed issues:\n{issue_lines}"
+
+
+@router.post("/release-notes")
+async def generate_release_notes(req: ReleaseNotesRequest):
+    """
+    Fetch all closed issues for a milestone and generate structured release notes via GPT.
+    """
+    milestone_title, issues = await _milestone_issues(req)
 
     if not issues:
         return {
@@ -381,26 +622,20 @@ async def generate_release_notes(req: ReleaseNotesRequest):
             "raw_markdown": f"## {milestone_title}\n\nNo closed issues.",
         }
 
-    # 3. Build issue list for the prompt
-    issue_lines = "\n".join(
-        f"#{i['number']}: {i['title']} [labels: {', '.join(l['name'] for l in i.get('labels', []))}]"
-        for i in issues[:80]   # cap at 80 to stay within token budget
-    )
-    user_msg = f"Milestone: {milestone_title}\n\nClosed issues:\n{issue_lines}"
-
-    # 4. Call GPT
+    # 3. Call GPT
     import json as _json
     try:
-        resp = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": RELEASE_NOTES_PROMPT},
-                {"role": "user",   "content": user_msg},
-            ],
-            temperature=0.3,
-            max_tokens=1800,
-            response_format={"type": "json_object"},
-        )
+        async with openai_slots:
+            resp = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": RELEASE_NOTES_PROMPT},
+                    {"role": "user",   "content": _release_notes_user_msg(milestone_title, issues)},
+                ],
+                temperature=0.3,
+                max_tokens=1800,
+                response_format={"type": "json_object"},
+            )
         data = _json.loads(resp.choices[0].message.content)
         return data
     except Exception as e:
@@ -413,24 +648,29 @@ async def generate_release_notes(req: ReleaseNotesRequest):
 # ─────────────────────────────────────────────────────────────────────────────
 
 # Common English stop-words to exclude from keyword extraction
-_STOP = {
+_STOP = frozenset({
     "the","a","an","is","in","on","at","to","for","of","and","or","but","with",
     "this","that","it","be","as","by","from","not","are","was","were","has",
     "have","had","when","if","can","will","does","do","how","what","which","fix",
     "fixes","error","issue","bug","crash","add","use","using","make","get",
     "set","update","remove","change","should","need","needs","would",
-}
+})
+
+# A whitespace-delimited token of 4+ letters, ignoring punctuation at its edges
+_EDGE_PUNCT = r"""[.,!?:;"'()\[\]{}]*"""
+_WORD_RE = re.compile(rf"(?<!\S){_EDGE_PUNCT}([^\W\d_]{{4,}}){_EDGE_PUNCT}(?!\S)")
 
 
 def _keywords(title: str, body: str, n: int = 4) -> list[str]:
     """Extract meaningful keywords from issue title + first 200 chars of body."""
     text = (title + " " + (body or "")[:200]).lower()
-    words = [w.strip(".,!?:;\"'()[]{}") for w in text.split()]
     seen, kws = set(), []
-    for w in words:
-        if len(w) > 3 and w not in _STOP and w not in seen and w.isalpha():
-            kws.append(w)
-            seen.add(w)
+    for match in _WORD_RE.finditer(text):
+        w = match.group(1)
+        if w in _STOP or w in seen:
+            continue
+        kws.append(w)
+        seen.add(w)
         if len(kws) >= n:
             break
     return kws
@@ -449,17 +689,20 @@ async def suggest_assignees(owner: str, repo: str, issue_number: int, user_token
         headers["Authorization"] = f"Bearer {user_token}"
 
     # 1. Read issue from cache (fast — no GitHub call needed)
-    repo_doc = await cached_repositories.find_one({"owner": owner, "name": repo})
+    repo_id = await _find_repo_id(owner, repo)
     issue_doc = None
-    if repo_doc:
-        issue_doc = await cached_issues.find_one({"repository_id": repo_doc["_id"], "number": issue_number})
+    if repo_id is not None:
+        issue_doc = await cached_issues.find_one(
+            {"repository_id": repo_id, "number": issue_number},
+            {"_id": 0, "title": 1, "body": 1},
+        )
 
     if issue_doc:
         title = issue_doc.get("title", "")
         body  = issue_doc.get("body", "") or ""
     else:
         # Fallback: fetch directly from GitHub
-        r = _req.get(f"https://api.github.com/repos/{owner}/{repo}/issues/{issue_number}", headers=headers)
+        r = await _limited_get(f"https://api.github.com/repos/{owner}/{repo}/issues/{issue_number}", headers=headers)
         if r.status_code != 200:
             raise HTTPException(status_code=404, detail="Issue not found")
         d = r.json()
@@ -471,7 +714,7 @@ async def suggest_assignees(owner: str, repo: str, issue_number: int, user_token
 
     # 2. Search for relevant files using keywords
     query = "+".join(keywords[:3]) + f"+repo:{owner}/{repo}"
-    search_res = _req.get(
+    search_res = await _limited_get(
         "https://api.github.com/search/code",
         headers={**headers, "Accept": "application/vnd.github.v3+json"},
         params={"q": query, "per_page": 5},
@@ -487,15 +730,21 @@ async def suggest_assignees(owner: str, repo: str, issue_number: int, user_token
     if not file_paths:
         return {"assignees": [], "source": "no_relevant_files"}
 
-    # 3. For each file, fetch recent commit authors
+    # 3. For each file, fetch recent commit authors (concurrently)
+    responses = await asyncio.gather(
+        *(
+            _limited_get(
+                f"https://api.github.com/repos/{owner}/{repo}/commits",
+                headers=headers,
+                params={"path": path, "per_page": 10},
+            )
+            for path in file_paths[:4]
+        ),
+        return_exceptions=True,
+    )
     author_counts: dict[str, dict] = {}
-    for path in file_paths[:4]:
-        commits_res = _req.get(
-            f"https://api.github.com/repos/{owner}/{repo}/commits",
-            headers=headers,
-            params={"path": path, "per_page": 10},
-        )
-        if commits_res.status_code != 200:
+    for commits_res in responses:
+        if isinstance(commits_res, Exception) or commits_res.status_code != 200:
             continue
         for c in commits_res.json():
             author = c.get("author")
@@ -567,77 +816,92 @@ async def get_risk_report(owner: str, repo: str):
     based on aggregated issue analytics + GPT interpretation.
     """
     # 1. Find repo in cache
-    repo_doc = await cached_repositories.find_one({"owner": owner, "name": repo})
-    if not repo_doc:
-        raise HTTPException(status_code=404, detail="Repository not found in cache. Please analyze the repository first.")
+    repo_id = await _repo_id(owner, repo, "Repository not found in cache. Please analyze the repository first.")
+
+    # ── Aggregate stats from cached issues (one $facet round trip) ──────────
 
-    repo_id = repo_doc["_id"]
+    from datetime import datetime, timedelta
+    cutoff_30  = datetime.utcnow() - timedelta(days=30)
+    cutoff_60  = datetime.utcnow() - timedelta(days=60)
+    cutoff_90  = datetime.utcnow() - timedelta(days=90)
+
+    def _count(match: dict) -> list:
+        return [{"$match": match}, {"$count": "n"}]
+
+    facet_docs = await cached_issues.aggregate([
+        {"$match": {"repository_id": repo_id}},
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "open": _count({"state": "open"}),
+            # Type breakdown
+            "by_type": [
+                {"$group": {"_id": "$ai_analysis.type", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}},
+            ],
+            # Criticality breakdown
+            "by_criticality": [{"$group": {"_id": "$ai_analysis.criticality", "count": {"$sum": 1}}}],
+            # Stale open issues (>30/60/90 days old)
+            "stale_30": _count({"state": "open", "created_at": {"$lt": cutoff_30}}),
+            "stale_60": _count({"state": "open", "created_at": {"$lt": cutoff_60}}),
+            "stale_90": _count({"state": "open", "created_at": {"$lt": cutoff_90}}),
+            "duplicates": _count({"duplicate_info.classification": "duplicate"}),
+            # Issues per month (last 6 months)
+            "by_month": [
+                {"$match": {"created_at": {"$exists": True}}},
+                {"$group": {
+                    "_id": {"year": {"$year": "$created_at"}, "month": {"$month": "$created_at"}},
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"_id.year": 1, "_id.month": 1}},
+                {"$limit": 6},
+            ],
+            # Top keyword clusters from open-issue titles (most frequent significant words)
+            "top_keywords": [
+                {"$match": {"state": "open"}},
+                {"$project": {"words": {"$regexFindAll": {
+                    "input": {"$toLower": "$title"}, "regex": "[a-z]{4,}"
+                }}}},
+                {"$unwind": "$words"},
+                {"$group": {"_id": "$words.match", "n": {"$sum": 1}}},
+                {"$match": {"_id": {"$nin": sorted(_STOP)}}},
+                {"$sort": {"n": -1, "_id": 1}},
+                {"$limit": 10},
+            ],
+        }},
+    ]).to_list(length=1)
+    facets = facet_docs[0]
 
-    # ── Aggregate stats from cached issues ───────────────────────────────────
+    def _n(name: str) -> int:
+        return facets[name][0]["n"] if facets[name] else 0
 
-    total = await cached_issues.count_documents({"repository_id": repo_id})
+    total = _n("total")
     if total == 0:
         raise HTTPException(status_code=404, detail="No issues found in cache for this repository.")
 
-    open_count  = await cached_issues.count_documents({"repository_id": repo_id, "state": "open"})
+    open_count  = _n("open")
     closed_count = total - open_count
 
-    # Type breakdown
-    type_cur = cached_issues.aggregate([
-        {"$match": {"repository_id": repo_id}},
-        {"$group": {"_id": "$ai_analysis.type", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-    ])
-    by_type = {(d["_id"] or "unknown"): d["count"] async for d in type_cur}
+    by_type = {(d["_id"] or "unknown"): d["count"] for d in facets["by_type"]}
+    by_criticality = {(d["_id"] or "unknown"): d["count"] for d in facets["by_criticality"]}
 
-    # Criticality breakdown
-    crit_cur = cached_issues.aggregate([
-        {"$match": {"repository_id": repo_id}},
-        {"$group": {"_id": "$ai_analysis.criticality", "count": {"$sum": 1}}},
-    ])
-    by_criticality = {(d["_id"] or "unknown"): d["count"] async for d in crit_cur}
-
-    # Stale open issues (>30 days old)
-    from datetime import datetime, timedelta
-    cutoff_30  = datetime.utcnow() - timedelta(days=30)
-    cutoff_60  = datetime.utcnow() - timedelta(days=60)
-    cutoff_90  = datetime.utcnow() - timedelta(days=90)
-    stale_30 = await cached_issues.count_documents({"repository_id": repo_id, "state": "open", "created_at": {"$lt": cutoff_30}})
-    stale_60 = await cached_issues.count_documents({"repository_id": repo_id, "state": "open", "created_at": {"$lt": cutoff_60}})
-    stale_90 = await cached_issues.count_documents({"repository_id": repo_id, "state": "open", "created_at": {"$lt": cutoff_90}})
+    stale_30 = _n("stale_30")
+    stale_60 = _n("stale_60")
+    stale_90 = _n("stale_90")
 
     # Duplicate rate
-    dup_count = await cached_issues.count_documents({"repository_id": repo_id, "duplicate_info.classification": "duplicate"})
+    dup_count = _n("duplicates")
     dup_rate  = round(dup_count / total * 100, 1) if total > 0 else 0
 
     # Security issues
     security_count = by_type.get("security", 0)
 
-    # Top keyword clusters from titles (most frequent significant words)
-    import re as _re
-    from collections import Counter as _Counter
-    title_cur = cached_issues.find({"repository_id": repo_id, "state": "open"}, {"title": 1})
-    word_freq: _Counter = _Counter()
-    async for doc in title_cur:
-        words = _re.findall(r"[a-zA-Z]{4,}", doc.get("title", "").lower())
-        word_freq.update(w for w in words if w not in _STOP)
-    top_keywords = [w for w, _ in word_freq.most_common(10)]
-
-    # Issues per month (last 6 months)
-    month_cur = cached_issues.aggregate([
-        {"$match": {"repository_id": repo_id, "created_at": {"$exists": True}}},
-        {"$group": {
-            "_id": {"year": {"$year": "$created_at"}, "month": {"$month": "$created_at"}},
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"_id.year": 1, "_id.month": 1}},
-        {"$limit": 6},
-    ])
     by_month = [
         {"label": f"{d['_id']['year']}-{d['_id']['month']:02d}", "count": d["count"]}
-        async for d in month_cur
+        for d in facets["by_month"]
     ]
 
+    top_keywords = [d["_id"] for d in facets["top_keywords"]]
+
     # ── Build context for GPT ────────────────────────────────────────────────
 
     stats_summary = f"""Repository: {owner}/{repo}
@@ -661,16 +925,17 @@ Monthly issue volume (recent): {by_month}"""
     # ── Call GPT ─────────────────────────────────────────────────────────────
     import json as _json
     try:
-        resp = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": RISK_REPORT_PROMPT},
-                {"role": "user",   "content": stats_summary},
-            ],
-            temperature=0.3,
-            max_tokens=1500,
-            response_format={"type": "json_object"},
-        )
+        async with openai_slots:
+            resp = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": RISK_REPORT_PROMPT},
+                    {"role": "user",   "content": stats_summary},
+                ],
+                temperature=0.3,
+                max_tokens=1500,
+                response_format={"type": "json_object"},
+            )
         gpt_data = _json.loads(resp.choices[0].message.content)
     except Exception as e:
         logger.error(f"Risk report GPT failed: {e}")
@@ -697,3 +962,102 @@ Monthly issue volume (recent): {by_month}"""
     }
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Bulk solutions — POST /api/ai/batch/analyze-repo, GET /api/ai/batch/{owner}/{repo}/{batch_id}
+# ─────────────────────────────────────────────────────────────────────────────
+
+class BatchAnalyzeRequest(BaseModel):
+    owner: str
+    repo: str
+
+
+def _solution_issue_id(issue: dict) -> str:
+    """Key a cached issue's solution like the UI does: GitHub's global id, else the number."""
+    return str(issue.get("id") or issue["number"])
+
+
+async def _store_solutions(owner: str, repo: str, repo_id, results: dict[str, dict]) -> int:
+    """Save batch solutions like /api/solution/generate does, without overwriting existing ones."""
+    if not results:
+        return 0
+    keys = [int(issue_id) for issue_id in results]
+    docs = await cached_issues.find(
+        {"repository_id": repo_id, "$or": [{"id": {"$in": keys}}, {"number": {"$in": keys}}]},
+        {"_id": 0, "id": 1, "number": 1, "title": 1},
+    ).batch_size(500).to_list(length=None)
+    titles = {_solution_issue_id(d): d.get("title", "") for d in docs}
+    now = datetime.now(timezone.utc).isoformat()
+    ops = [
+        UpdateOne(
+            {"owner": owner, "repo": repo, "issue_id": issue_id},
+            {"$setOnInsert": {
+                **solution,
+                "owner": owner,
+                "repo": repo,
+                "issue_title": titles.get(issue_id, ""),
+                "created_at": now,
+                "had_code_context": False,
+            }},
+            upsert=True,
+        )
+        for issue_id, solution in results.items()
+    ]
+    result = await solutions.bulk_write(ops, ordered=False)
+    return result.upserted_count
+
+
+@router.post("/batch/analyze-repo")
+async def batch_analyze_repo(req: BatchAnalyzeRequest):
+    """
+    Queue GPT solutions for every cached open issue of a repository that has
+    none yet, through the OpenAI Batch API (half price, finishes within 24h).
+    Poll GET /api/ai/batch/{owner}/{repo}/{batch_id} to store the results.
+    """
+    repo_id = await _repo_id(req.owner, req.repo)
+
+    issues = await cached_issues.find(
+        {"repository_id": repo_id, "state": "open"},
+        {"_id": 0, "id": 1, "number": 1, "title": 1, "body": 1},
+    ).batch_size(500).to_list(length=None)
+    issue_ids = [_solution_issue_id(i) for i in issues]
+    solved_docs = await solutions.find(
+        {"owner": req.owner, "repo": req.repo, "issue_id": {"$in": issue_ids}}, {"_id": 0, "issue_id": 1}
+    ).batch_size(500).to_list(length=None)
+    solved = {d["issue_id"] for d in solved_docs}
+    todo = [
+        {"issue_id": issue_id, "title": i.get("title", ""), "body": i.get("body", ""),
+         "owner": req.owner, "repo": req.repo}
+        for issue_id, i in zip(issue_ids, issues) if issue_id not in solved
+    ]
+    if not todo:
+        return {"batch_id": None, "submitted": 0, "stored_from_cache": 0}
+
+    try:
+        cached, batch_id = await submit_gpt_batch(todo)
+    except Exception as e:
+        logger.error(f"GPT batch submission failed: {e}")
+        raise HTTPException(status_code=500, detail=f"GPT batch submission failed: {e}")
+
+    stored = await _store_solutions(req.owner, req.repo, repo_id, cached)
+    return {"batch_id": batch_id, "submitted": len(todo) - len(cached), "stored_from_cache": stored}
+
+
+@router.get("/batch/{owner}/{repo}/{batch_id}")
+async def get_batch_status(owner: str, repo: str, batch_id: str):
+    """
+    Check a solution batch; once it has finished, store its solutions.
+    Safe to call repeatedly — already stored solutions are left untouched.
+    """
+    repo_id = await _repo_id(owner, repo)
+
+    try:
+        results = await collect_gpt_batch(batch_id)
+    except Exception as e:
+        logger.error(f"GPT batch {batch_id} lookup failed: {e}")
+        raise HTTPException(status_code=500, detail=f"GPT batch lookup failed: {e}")
+
+    if results is None:
+        return {"batch_id": batch_id, "status": "in_progress"}
+
+    stored = await _store_solutions(owner, repo, repo_id, results)
+    return {"batch_id": batch_id, "status": "finished", "solutions": len(results), "stored": stored}
@@ -1,10 +1,11 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
+from app.api.github import analyze_issues_batch, analyze_single_issue
 
 router = APIRouter(tags=["Analysis"])
 
 
-from typing import Optional, Union
+from typing import List, Optional, Union
 
 class AnalysisRequest(BaseModel):
     id: Union[int, str]  # Accept both int and str since GitHub IDs can be either
@@ -22,8 +23,6 @@ def analyze_issue(req: AnalysisRequest):
     Args:
         req: Issue data including owner, repo, id, title, and body
     """
-    from app.api.github import analyze_single_issue
-
     result = analyze_single_issue(
         owner=req.owner,
         repo=req.repo,
@@ -35,3 +34,37 @@ def analyze_issue(req: AnalysisRequest):
     )
     
     return result
+
+
+class BatchIssue(BaseModel):
+    id: Union[int, str]
+    title: str
+    body: Optional[str] = ""
+
+
+class BatchAnalysisRequest(BaseModel):
+    owner: str
+    repo: str
+    issues: List[BatchIssue]
+
+
+@router.post("/analyze/batch")
+def analyze_issues(req: BatchAnalysisRequest):
+    """
+    Analyze several issues of one repository at once.
+    
+    Embeds all issues in one batched pass and runs a single Chroma query;
+    results come back in the same order as `issues`.
+    """
+    results = analyze_issues_batch(
+        owner=req.owner,
+        repo=req.repo,
+        issues=[issue.dict() for issue in req.issues],
+    )
+    
+    return {
+        "results": [
+            {"id": issue.id, **result}
+            for issue, result in zip(req.issues, results)
+        ]
+    }
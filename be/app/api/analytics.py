@@ -5,12 +5,21 @@ GET /api/analytics/summary?owner=&repo=
 """
 
 import logging
+from cachetools import TTLCache
 from fastapi import APIRouter, Query, HTTPException
 from app.db.mongo import cached_repositories, cached_issues
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
 
+# (owner, repo) -> summary payload. Issues only change on sync / webhook,
+# which call forget_summary; other workers catch up within the TTL.
+_SUMMARY_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+
+def forget_summary(owner: str, repo: str) -> None:
+    _SUMMARY_CACHE.pop((owner, repo), None)
+
 
 @router.get("/summary")
 async def get_analytics_summary(
@@ -24,81 +33,90 @@ async def get_analytics_summary(
       - Duplicate rate
       - Criticality distribution
     """
+    cached = _SUMMARY_CACHE.get((owner, repo))
+    if cached is not None:
+        return cached
+
     try:
         # Find repository
-        repo_doc = await cached_repositories.find_one({"owner": owner, "name": repo})
+        repo_doc = await cached_repositories.find_one({"owner": owner, "name": repo}, {"_id": 1})
         if not repo_doc:
             raise HTTPException(status_code=404, detail="Repository not found in cache")
 
         repo_id = repo_doc["_id"]
 
-        # ── 1. Type breakdown ────────────────────────────────────────────────
-        type_pipeline = [
+        # One $facet pass over the repository's issues instead of a query per stat
+        facet_docs = await cached_issues.aggregate([
             {"$match": {"repository_id": repo_id}},
-            {"$group": {"_id": "$ai_analysis.type", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}}
-        ]
-        type_cursor = cached_issues.aggregate(type_pipeline)
-        by_type = {
-            (doc["_id"] or "unknown"): doc["count"]
-            async for doc in type_cursor
-        }
-
-        # ── 2. Issues opened per week (last 12 weeks) ────────────────────────
-        week_pipeline = [
-            {"$match": {"repository_id": repo_id, "created_at": {"$exists": True}}},
-            {
-                "$group": {
-                    "_id": {
-                        "year": {"$isoWeekYear": "$created_at"},
-                        "week": {"$isoWeek": "$created_at"},
+            {"$facet": {
+                # ── 1. Type breakdown ────────────────────────────────────────
+                "by_type": [
+                    {"$group": {"_id": "$ai_analysis.type", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                ],
+                # ── 2. Issues opened per week (last 12 weeks) ────────────────
+                "by_week": [
+                    {"$match": {"created_at": {"$exists": True}}},
+                    {
+                        "$group": {
+                            "_id": {
+                                "year": {"$isoWeekYear": "$created_at"},
+                                "week": {"$isoWeek": "$created_at"},
+                            },
+                            "count": {"$sum": 1}
+                        }
                     },
-                    "count": {"$sum": 1}
-                }
-            },
-            {"$sort": {"_id.year": 1, "_id.week": 1}},
-            {"$limit": 12}
-        ]
-        week_cursor = cached_issues.aggregate(week_pipeline)
+                    {"$sort": {"_id.year": 1, "_id.week": 1}},
+                    {"$limit": 12},
+                ],
+                # ── 3. Criticality distribution ──────────────────────────────
+                "by_criticality": [
+                    {"$group": {"_id": "$ai_analysis.criticality", "count": {"$sum": 1}}},
+                ],
+                # ── 4. Totals: duplicate rate + state (open / closed) ────────
+                "counts": [
+                    {
+                        "$group": {
+                            "_id": None,
+                            "total": {"$sum": 1},
+                            "open": {"$sum": {"$cond": [{"$eq": ["$state", "open"]}, 1, 0]}},
+                            "closed": {"$sum": {"$cond": [{"$eq": ["$state", "closed"]}, 1, 0]}},
+                            "duplicates": {"$sum": {"$cond": [
+                                {"$eq": ["$duplicate_info.classification", "duplicate"]}, 1, 0
+                            ]}},
+                        }
+                    },
+                ],
+            }},
+        ]).to_list(length=1)
+        facets = facet_docs[0]
+
+        by_type = {(doc["_id"] or "unknown"): doc["count"] for doc in facets["by_type"]}
         by_week = [
             {
                 "label": f"W{doc['_id']['week']}/{doc['_id']['year']}",
                 "count": doc["count"]
             }
-            async for doc in week_cursor
+            for doc in facets["by_week"]
         ]
+        by_criticality = {(doc["_id"] or "unknown"): doc["count"] for doc in facets["by_criticality"]}
 
-        # ── 3. Criticality distribution ──────────────────────────────────────
-        crit_pipeline = [
-            {"$match": {"repository_id": repo_id}},
-            {"$group": {"_id": "$ai_analysis.criticality", "count": {"$sum": 1}}},
-        ]
-        crit_cursor = cached_issues.aggregate(crit_pipeline)
-        by_criticality = {
-            (doc["_id"] or "unknown"): doc["count"]
-            async for doc in crit_cursor
-        }
-
-        # ── 4. Duplicate rate ────────────────────────────────────────────────
-        total = await cached_issues.count_documents({"repository_id": repo_id})
-        duplicate_count = await cached_issues.count_documents({
-            "repository_id": repo_id,
-            "duplicate_info.classification": "duplicate"
-        })
+        # $group emits no document for a repository without issues
+        counts = facets["counts"][0] if facets["counts"] else {}
+        total = counts.get("total", 0)
+        duplicate_count = counts.get("duplicates", 0)
         duplicate_rate = round(duplicate_count / total * 100, 1) if total > 0 else 0
 
-        # ── 5. State breakdown (open / closed) ──────────────────────────────
-        open_count = await cached_issues.count_documents({"repository_id": repo_id, "state": "open"})
-        closed_count = await cached_issues.count_documents({"repository_id": repo_id, "state": "closed"})
-
-        return {
+        summary = {
             "total_issues": total,
             "by_type": by_type,
             "by_week": by_week,
             "by_criticality": by_criticality,
             "duplicate_rate": duplicate_rate,
-            "state": {"open": open_count, "closed": closed_count}
+            "state": {"open": counts.get("open", 0), "closed": counts.get("closed", 0)}
         }
+        _SUMMARY_CACHE[(owner, repo)] = summary
+        return summary
 
     except HTTPException:
         raise
@@ -138,10 +156,30 @@ async def get_global_analytics(
         repo_cursor = cached_issues.aggregate(repo_pipeline)
         repo_counts_raw = [doc async for doc in repo_cursor]
 
+        # Recent issues feed (sampled across all repos)
+        cursor = cached_issues.find(
+            match,
+            {"number": 1, "title": 1, "state": 1, "ai_analysis": 1,
+             "repository_id": 1, "created_at": 1}
+        ).sort("created_at", -1).limit(limit)
+        issues_raw = [doc async for doc in cursor]
+
+        # Resolve every repository referenced above in one query
+        repo_ids = list(
+            {entry["_id"] for entry in repo_counts_raw}
+            | {doc["repository_id"] for doc in issues_raw if doc.get("repository_id")}
+        )
+        repos_by_id = {
+            r["_id"]: r
+            async for r in cached_repositories.find(
+                {"_id": {"$in": repo_ids}}, {"owner": 1, "name": 1, "full_name": 1}
+            )
+        }
+
         # Enrich repo counts with owner/name
         repo_counts = []
         for entry in repo_counts_raw:
-            r = await cached_repositories.find_one({"_id": entry["_id"]})
+            r = repos_by_id.get(entry["_id"])
             if r:
                 repo_counts.append({
                     "owner": r.get("owner", ""),
@@ -150,23 +188,10 @@ async def get_global_analytics(
                     "count": entry["count"],
                 })
 
-        # Recent issues feed (sampled across all repos)
-        cursor = cached_issues.find(
-            match,
-            {"number": 1, "title": 1, "state": 1, "ai_analysis": 1,
-             "repository_id": 1, "created_at": 1}
-        ).sort("created_at", -1).limit(limit)
-        issues_raw = [doc async for doc in cursor]
-
         # Enrich with repo info
-        rid_cache: dict = {}
         issues = []
         for doc in issues_raw:
-            rid = doc.get("repository_id")
-            if rid and str(rid) not in rid_cache:
-                r = await cached_repositories.find_one({"_id": rid})
-                rid_cache[str(rid)] = r
-            r = rid_cache.get(str(rid), {}) if rid else {}
+            r = repos_by_id.get(doc.get("repository_id")) or {}
             issues.append({
                 "number": doc.get("number"),
                 "title": doc.get("title"),
@@ -2,17 +2,23 @@
 Authentication API endpoints.
 """
 
+import asyncio
+import threading
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException, Depends, Response, Request
 from fastapi.responses import RedirectResponse
 from typing import Optional
 from app.auth.auth_service import auth_service
+from app.auth.deps import bearer_token, verify_token_cached
 from app.auth.oauth_providers import oauth_providers
 from app.auth.models import UserCreate, UserLogin, TokenResponse, UserResponse
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
-# Store OAuth states temporarily (in production, use Redis)
-oauth_states = {}
+# /me results per user id: skips the user lookup for frontend polling. The
+# token itself is still checked (and its expiry) by verify_token_cached.
+_ME_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+_ME_CACHE_LOCK = threading.Lock()  # sync routes run on the threadpool
 
 
 # ============================================================================
@@ -49,31 +55,42 @@ def login(login_data: UserLogin):
 
 
 @router.post("/logout")
-def logout(response: Response):
+def logout(request: Request, response: Response):
     """Logout user (client should delete token)."""
     # In a more advanced implementation, you would invalidate the token
+    token = bearer_token(request)
+    payload = verify_token_cached(token) if token else None
+    if payload:
+        with _ME_CACHE_LOCK:
+            _ME_CACHE.pop(payload.get("sub"), None)
     return {"message": "Logged out successfully"}
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user(request: Request):
+def get_current_user(request: Request, response: Response):
     """Get current user information."""
     # Extract token from Authorization header
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
+    token = bearer_token(request)
+    if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    token = auth_header.split(" ")[1]
-    payload = auth_service.verify_token(token)
+    payload = verify_token_cached(token)
     
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    user = auth_service.get_user_by_id(payload.get("sub"))
+    user_id = payload.get("sub")
+    with _ME_CACHE_LOCK:
+        cached = _ME_CACHE.get(user_id)
+    if cached is not None:
+        response.headers["X-Cache"] = "HIT"
+        return cached
+    
+    user = auth_service.get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    return UserResponse(
+    user_response = UserResponse(
         id=user.id,
         email=user.email,
         full_name=user.full_name,
@@ -82,6 +99,10 @@ def get_current_user(request: Request):
         created_at=user.created_at,
         is_verified=user.is_verified
     )
+    with _ME_CACHE_LOCK:
+        _ME_CACHE[user_id] = user_response
+    response.headers["X-Cache"] = "MISS"
+    return user_response
 
 
 # ============================================================================
@@ -92,7 +113,7 @@ def get_current_user(request: Request):
 def google_login():
     """Initiate Google OAuth flow."""
     state = oauth_providers.generate_oauth_state()
-    oauth_states[state] = {"provider": "google"}
+    oauth_providers.save_oauth_state(state, "google")
     
     auth_url = oauth_providers.get_google_auth_url(state)
     return {"auth_url": auth_url, "state": state}
@@ -108,39 +129,34 @@ def google_callback(code: str, state: str):
     )
 
 @router.post("/google/exchange")
-def google_exchange_token(code: str, state: str):
+async def google_exchange_token(code: str, state: str):
     """Exchange Google OAuth code for JWT token."""
-    # Verify state
-    if state not in oauth_states:
+    # Verify (and use up) state
+    if not await asyncio.to_thread(oauth_providers.consume_oauth_state, state, "google"):
         raise HTTPException(status_code=400, detail="Invalid or expired state parameter")
     
     try:
         # Exchange code for tokens
-        tokens = oauth_providers.exchange_google_code(code)
+        tokens = await oauth_providers.exchange_google_code(code)
         access_token = tokens.get("access_token")
         
         if not access_token:
             raise HTTPException(status_code=400, detail="Failed to get access token from Google")
         
         # Get user info from Google
-        user_info = oauth_providers.get_google_user_info(access_token)
+        user_info = await oauth_providers.get_google_user_info(access_token)
         
         # Find or create user - match the actual function signature
-        user = oauth_providers.find_or_create_oauth_user(
+        user = await asyncio.to_thread(
+            oauth_providers.find_or_create_oauth_user,
             provider="google",
             provider_user_id=user_info["id"],
             email=user_info["email"],
             user_info=user_info  # Pass the full user_info dict
         )
         
-        # Create JWT token
-        token_response = auth_service.create_token_response(user)
-        
-        # Clean up state
-        oauth_states.pop(state, None)
-        
-        # Return token as JSON
-        return token_response
+        # Create JWT token and return it as JSON
+        return auth_service.create_token_response(user)
         
     except HTTPException:
         raise
@@ -157,177 +173,112 @@ def google_exchange_token(code: str, state: str):
 def github_login():
     """Initiate GitHub OAuth flow for login."""
     state = oauth_providers.generate_oauth_state()
-    oauth_states[state] = {"provider": "github"}
+    oauth_providers.save_oauth_state(state, "github")
     
     auth_url = oauth_providers.get_github_auth_url(state)
     return {"auth_url": auth_url, "state": state}
 
 
+async def _complete_github_login(code: str) -> TokenResponse:
+    """Exchange a GitHub code, find or create the user, store the GitHub token and issue a JWT."""
+    # Exchange code for tokens
+    tokens = await oauth_providers.exchange_github_code(code)
+    access_token = tokens.get("access_token")
+    
+    if not access_token:
+        raise HTTPException(status_code=400, detail="Failed to get access token from GitHub")
+    
+    # Get user info
+    user_info = await oauth_providers.get_github_user_info(access_token)
+    
+    # Get primary email (fetched separately if not public)
+    email = user_info.get("email")
+    if not email:
+        email = (
+            await oauth_providers.get_github_primary_email(access_token)
+            or f"{user_info['login']}@github.local"
+        )
+    
+    # Find or create user
+    user = await asyncio.to_thread(
+        oauth_providers.find_or_create_oauth_user,
+        provider="github",
+        provider_user_id=str(user_info["id"]),
+        email=email,
+        user_info=user_info
+    )
+    
+    # Save GitHub token for write operations (posting comments, closing issues, etc.)
+    from app.db.mongo import async_db as _db
+    from bson import ObjectId
+    import datetime as _dt
+    _now = _dt.datetime.utcnow()
+    # 1) Save to user_tokens keyed by user_id + github_username
+    await _db["user_tokens"].update_one(
+        {"github_username": user_info["login"]},
+        {"$set": {
+            "github_username": user_info["login"],
+            "github_user_id": str(user_info["id"]),
+            "user_id": user.id,
+            "access_token": access_token,
+            "updated_at": _now,
+        }, "$setOnInsert": {"created_at": _now}},
+        upsert=True
+    )
+    # 2) Also store on user's oauth_providers sub-document for direct lookup
+    try:
+        await _db["users"].update_one(
+            {
+                "_id": ObjectId(user.id),
+                "oauth_providers.provider": "github",
+                "oauth_providers.provider_user_id": str(user_info["id"]),
+            },
+            {"$set": {
+                "oauth_providers.$.access_token": access_token,
+                "oauth_providers.$.username": user_info["login"],
+            }}
+        )
+    except Exception:
+        pass  # non-critical
+    
+    # Create JWT token
+    return auth_service.create_token_response(user)
+
+
 @router.get("/github/callback")
-def github_callback(code: str, state: str):
+async def github_callback(code: str, state: str):
     """Handle GitHub OAuth callback for login."""
-    # Verify state
-    if state not in oauth_states:
+    # Verify (and use up) state
+    if not await asyncio.to_thread(oauth_providers.consume_oauth_state, state, "github"):
         raise HTTPException(status_code=400, detail="Invalid state parameter")
     
+    frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
     try:
-        # Exchange code for tokens
-        tokens = oauth_providers.exchange_github_code(code)
-        access_token = tokens.get("access_token")
-        
-        # Get user info
-        user_info = oauth_providers.get_github_user_info(access_token)
-        
-        # Get primary email
-        email = user_info.get("email")
-        if not email:
-            # Fetch emails separately if not public
-            import requests
-            headers = {"Authorization": f"Bearer {access_token}"}
-            emails_response = requests.get("https://api.github.com/user/emails", headers=headers)
-            emails = emails_response.json()
-            primary_email = next((e for e in emails if e.get("primary")), None)
-            email = primary_email["email"] if primary_email else f"{user_info['login']}@github.local"
-        
-        # Find or create user
-        user = oauth_providers.find_or_create_oauth_user(
-            provider="github",
-            provider_user_id=str(user_info["id"]),
-            email=email,
-            user_info=user_info
-        )
-        
-        # Save GitHub token for write operations (posting comments, closing issues, etc.)
-        from app.db.mongo import db as _db
-        from bson import ObjectId
-        import datetime as _dt
-        _now = _dt.datetime.utcnow()
-        # 1) Save to user_tokens keyed by user_id + github_username
-        _db["user_tokens"].update_one(
-            {"github_username": user_info["login"]},
-            {"$set": {
-                "github_username": user_info["login"],
-                "github_user_id": str(user_info["id"]),
-                "user_id": user.id,
-                "access_token": access_token,
-                "updated_at": _now,
-            }, "$setOnInsert": {"created_at": _now}},
-            upsert=True
-        )
-        # 2) Also store on user's oauth_providers sub-document for direct lookup
-        try:
-            _db["users"].update_one(
-                {
-                    "_id": ObjectId(user.id),
-                    "oauth_providers.provider": "github",
-                    "oauth_providers.provider_user_id": str(user_info["id"]),
-                },
-                {"$set": {
-                    "oauth_providers.$.access_token": access_token,
-                    "oauth_providers.$.username": user_info["login"],
-                }}
-            )
-        except Exception:
-            pass  # non-critical
-        
-        # Create JWT token
-        token_response = auth_service.create_token_response(user)
-        
-        # Clean up state
-        del oauth_states[state]
+        token_response = await _complete_github_login(code)
         
         # Redirect to frontend with token as query parameter
-        frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
         return RedirectResponse(
             url=f"{frontend_url}/auth/github/callback?token={token_response.access_token}"
         )
         
     except Exception as e:
         # Redirect to frontend with error
-        frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
+        error = e.detail if isinstance(e, HTTPException) else str(e)
         return RedirectResponse(
-            url=f"{frontend_url}/auth/github/callback?error={str(e)}"
+            url=f"{frontend_url}/auth/github/callback?error={error}"
         )
 
 
 @router.post("/github/exchange")
-def github_exchange_token(code: str, state: str):
+async def github_exchange_token(code: str, state: str):
     """Exchange GitHub OAuth code for JWT token (JSON endpoint)."""
-    # Verify state
-    if state not in oauth_states:
+    # Verify (and use up) state
+    if not await asyncio.to_thread(oauth_providers.consume_oauth_state, state, "github"):
         raise HTTPException(status_code=400, detail="Invalid or expired state parameter")
     
     try:
-        # Exchange code for tokens
-        tokens = oauth_providers.exchange_github_code(code)
-        access_token = tokens.get("access_token")
-        
-        if not access_token:
-            raise HTTPException(status_code=400, detail="Failed to get access token from GitHub")
-        
-        # Get user info
-        user_info = oauth_providers.get_github_user_info(access_token)
-        
-        # Get primary email
-        email = user_info.get("email")
-        if not email:
-            # Fetch emails separately if not public
-            import requests
-            headers = {"Authorization": f"Bearer {access_token}"}
-            emails_response = requests.get("https://api.github.com/user/emails", headers=headers)
-            emails = emails_response.json()
-            primary_email = next((e for e in emails if e.get("primary")), None)
-            email = primary_email["email"] if primary_email else f"{user_info['login']}@github.local"
-        
-        # Find or create user
-        user = oauth_providers.find_or_create_oauth_user(
-            provider="github",
-            provider_user_id=str(user_info["id"]),
-            email=email,
-            user_info=user_info
-        )
-        
-        # Save GitHub token for write operations (posting comments, closing issues, etc.)
-        from app.db.mongo import db as _db
-        from bson import ObjectId
-        import datetime as _dt
-        _now = _dt.datetime.utcnow()
-        # 1) Save to user_tokens keyed by user_id + github_username
-        _db["user_tokens"].update_one(
-            {"github_username": user_info["login"]},
-            {"$set": {
-                "github_username": user_info["login"],
-                "github_user_id": str(user_info["id"]),
-                "user_id": user.id,
-                "access_token": access_token,
-                "updated_at": _now,
-            }, "$setOnInsert": {"created_at": _now}},
-            upsert=True
-        )
-        # 2) Also store on user's oauth_providers sub-document for direct lookup
-        try:
-            _db["users"].update_one(
-                {
-                    "_id": ObjectId(user.id),
-                    "oauth_providers.provider": "github",
-                    "oauth_providers.provider_user_id": str(user_info["id"]),
-                },
-                {"$set": {
-                    "oauth_providers.$.access_token": access_token,
-                    "oauth_providers.$.username": user_info["login"],
-                }}
-            )
-        except Exception:
-            pass  # non-critical
-        
-        # Create JWT token
-        token_response = auth_service.create_token_response(user)
-        
-        # Clean up state
-        del oauth_states[state]
-        
         # Return token as JSON
-        return token_response
+        return await _complete_github_login(code)
         
     except HTTPException:
         raise
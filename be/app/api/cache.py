@@ -1,11 +1,12 @@
 """
 Cache API endpoints for MongoDB-backed issue caching
 """
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, List
 import logging
 
+from app.auth.deps import current_user_id
 from app.db.mongo import cached_repositories, cached_issues
 from app.services.cache_service import CacheService
 
@@ -23,7 +24,6 @@ class SyncRequest(BaseModel):
 
 @router.get("/issues")
 async def get_cached_issues(
-    request: Request,
     owner: str = Query(..., description="Repository owner"),
     repo: str = Query(..., description="Repository name"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -33,7 +33,8 @@ async def get_cached_issues(
     type: Optional[str] = Query(None, description="Filter by type (unique/duplicate/potential)"),
     criticality: Optional[str] = Query(None, description="Filter by criticality"),
     min_similarity: Optional[float] = Query(None, ge=0, le=100, description="Minimum similarity score"),
-    user_token: Optional[str] = Query(None, description="GitHub user token")
+    user_token: Optional[str] = Query(None, description="GitHub user token"),
+    user_id: Optional[str] = Depends(current_user_id),
 ):
     """
     Get cached issues with optional filters and pagination.
@@ -43,19 +44,12 @@ async def get_cached_issues(
     try:
         logger.info(f"Fetching cached issues for {owner}/{repo} (page {page}, per_page {per_page})")
 
-        # Resolve user_id from JWT if present, then backfill repo attribution
-        user_id: Optional[str] = None
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            from app.auth.auth_service import auth_service
-            payload = auth_service.verify_token(auth_header.split(" ", 1)[1])
-            if payload:
-                user_id = payload.get("sub")
-
+        # Backfill repo attribution for the authenticated caller
         if user_id:
-            # Add this user to the user_ids array (idempotent — addToSet never duplicates)
+            # Add this user to the user_ids array. The $ne filter makes the
+            # common already-attributed case a read, with no write or oplog entry.
             await cached_repositories.update_one(
-                {"owner": owner, "name": repo},
+                {"owner": owner, "name": repo, "user_ids": {"$ne": user_id}},
                 {"$addToSet": {"user_ids": user_id}}
             )
 
@@ -89,7 +83,7 @@ async def get_cached_issues(
 
 
 @router.post("/sync")
-async def sync_repository(request: Request, body: SyncRequest):
+async def sync_repository(body: SyncRequest, user_id: Optional[str] = Depends(current_user_id)):
     """
     Sync repository issues from GitHub to cache.
     Stamps the synced_by_user_id so the repo only appears for this user.
@@ -97,15 +91,6 @@ async def sync_repository(request: Request, body: SyncRequest):
     try:
         logger.info(f"Syncing repository {body.owner}/{body.repo} (force={body.force_full_sync})")
         
-        # Resolve user_id from JWT if provided
-        user_id: Optional[str] = None
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            from app.auth.auth_service import auth_service
-            payload = auth_service.verify_token(auth_header.split(" ", 1)[1])
-            if payload:
-                user_id = payload.get("sub")
-        
         result = await cache_service.sync_repository(
             owner=body.owner,
             repo=body.repo,
@@ -129,13 +114,21 @@ async def get_cache_status(
     Get cache status for a repository
     """
     try:
-        # Find repository in cache
-        repo_doc = await cached_repositories.find_one({
-            "owner": owner,
-            "name": repo
-        })
+        # Find repository in cache and count its issues in one round trip
+        repo_docs = await cached_repositories.aggregate([
+            {"$match": {"owner": owner, "name": repo}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": cached_issues.name,
+                "localField": "_id",
+                "foreignField": "repository_id",
+                "pipeline": [{"$count": "n"}],
+                "as": "issue_count",
+            }},
+            {"$project": {"last_synced": 1, "is_fresh": 1, "issue_count": 1}},
+        ]).to_list(length=1)
         
-        if not repo_doc:
+        if not repo_docs:
             return {
                 "cached": False,
                 "last_synced": None,
@@ -143,10 +136,9 @@ async def get_cache_status(
                 "is_fresh": False
             }
         
-        # Count issues
-        issue_count = await cached_issues.count_documents({
-            "repository_id": repo_doc["_id"]
-        })
+        repo_doc = repo_docs[0]
+        # $count emits nothing for a repository without issues
+        issue_count = repo_doc["issue_count"][0]["n"] if repo_doc["issue_count"] else 0
         
         return {
             "cached": True,
@@ -161,22 +153,12 @@ async def get_cache_status(
 
 
 @router.get("/repositories")
-async def list_repositories(request: Request):
+async def list_repositories(user_id: Optional[str] = Depends(current_user_id)):
     """List repositories — scoped to the current user when a JWT is provided."""
     logger.info("Listing repositories")
 
-    # Resolve user_id from JWT if present
-    user_id: Optional[str] = None
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        from app.auth.auth_service import auth_service
-        payload = auth_service.verify_token(auth_header.split(" ", 1)[1])
-        if payload:
-            user_id = payload.get("sub")
-
     try:
-        service = CacheService()
-        repositories = await service.list_repositories(user_id=user_id)
+        repositories = await cache_service.list_repositories(user_id=user_id)
         return {"repositories": repositories}
     except Exception as e:
         logger.error(f"Error listing repositories: {e}")
@@ -189,8 +171,7 @@ async def delete_repository(owner: str, repo: str):
     logger.info(f"Deleting repository {owner}/{repo}")
     
     try:
-        service = CacheService()
-        result = await service.delete_repository(owner, repo)
+        result = await cache_service.delete_repository(owner, repo)
         return result
     except Exception as e:
         logger.error(f"Error deleting repository: {e}")
@@ -204,15 +185,26 @@ async def get_single_cached_issue(owner: str, repo: str, issue_number: int):
     Returns the full issue document including body and ai_analysis.
     """
     try:
-        repo_doc = await cached_repositories.find_one({"owner": owner, "name": repo})
-        if not repo_doc:
+        # Repository lookup and issue join in one round trip; the join is
+        # served by the (repository_id, number) index
+        repo_docs = await cached_repositories.aggregate([
+            {"$match": {"owner": owner, "name": repo}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": cached_issues.name,
+                "localField": "_id",
+                "foreignField": "repository_id",
+                "pipeline": [{"$match": {"number": issue_number}}, {"$limit": 1}],
+                "as": "issue",
+            }},
+            {"$project": {"issue": 1}},
+        ]).to_list(length=1)
+        if not repo_docs:
             raise HTTPException(status_code=404, detail="Repository not found in cache")
 
-        issue = await cached_issues.find_one(
-            {"repository_id": repo_doc["_id"], "number": issue_number},
-        )
-        if not issue:
+        if not repo_docs[0]["issue"]:
             raise HTTPException(status_code=404, detail="Issue not found in cache")
+        issue = repo_docs[0]["issue"][0]
 
         issue["_id"] = str(issue["_id"])
         issue["repository_id"] = str(issue["repository_id"])
@@ -1,11 +1,18 @@
 from fastapi import APIRouter, HTTPException, Request, Query
 from pydantic import BaseModel
+import asyncio
+import bisect
+import hashlib
+import threading
+import httpx
 import requests
+from cachetools import TTLCache
 from app.utils.github_fetcher import github_fetcher
 from app.vector.embeddings import EmbeddingService
 from app.vector.chroma_client import chroma
 from app.ai.categorizer import categorizer
-import numpy as np
+from app.ai.issue_text import build_issue_text
+from app.auth.deps import bearer_token
 from datetime import datetime
 from app.db.mongo import repos_collection, cached_repositories, cached_issues
 
@@ -15,113 +22,284 @@ router = APIRouter(prefix="/api/github", tags=["GitHub"])
 
 embedder = EmbeddingService()
 
-def cosine_similarity(a, b):
-    a = np.array(a)
-    b = np.array(b)
-    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+# Pooled HTTP/2 client for the async routes; closed from the app lifespan
+_http = httpx.AsyncClient(http2=True, base_url="https://api.github.com", timeout=15)
+
+
+async def close_http_client():
+    await _http.aclose()
+
+# Finished analyses keyed by issue id + content hash, so re-fetching a page
+# skips embed + query for unchanged issues. Indexing new issues, sync and
+# webhooks call forget_analyses; the TTL covers the other workers.
+_ANALYSIS_CACHE: TTLCache = TTLCache(maxsize=20_000, ttl=300)
+_ANALYSIS_CACHE_LOCK = threading.Lock()  # analyses run on worker threads
+
+
+# (full_name, user_id) of repos upserted by fetch_repo in the last minute;
+# matches github_fetcher's repo-details TTL.
+_RECENT_REPO_UPSERTS: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_RECENT_REPO_UPSERTS_LOCK = threading.Lock()
+
+
+def _analysis_key(owner, repo, issue):
+    content = f"{issue.get('title', '')}\0{issue.get('body', '') or ''}"
+    return (owner, repo, str(issue.get("id", "")), hashlib.blake2b(content.encode(), digest_size=16).digest())
+
+
+def _cached_analysis(key):
+    with _ANALYSIS_CACHE_LOCK:
+        return _ANALYSIS_CACHE.get(key)
+
+
+def _store_analysis(key, result):
+    with _ANALYSIS_CACHE_LOCK:
+        _ANALYSIS_CACHE[key] = result
+
+
+def forget_analyses(owner: str, repo: str) -> None:
+    """Drop a repo's cached analyses; its issues may have new neighbours."""
+    with _ANALYSIS_CACHE_LOCK:
+        for key in [key for key in _ANALYSIS_CACHE if key[:2] == (owner, repo)]:
+            _ANALYSIS_CACHE.pop(key, None)
+
+def _new_issue_analysis(primary_category):
+    return {
+        "ai_analysis": {"type": primary_category, "criticality": "low", "confidence": 0, "similar_issues": []},
+        "duplicate_info": {"classification": "new", "similarity": 0, "reuse_type": "minimal"}
+    }
+
+
+def _failed_analysis():
+    return {
+        "ai_analysis": {"type": "unknown", "criticality": "unknown", "confidence": 0, "similar_issues": []},
+        "duplicate_info": {"classification": "unknown", "similarity": 0, "reuse_type": "minimal"}
+    }
+
+
+# Similarity band edges (each band includes its lower edge) and the label of
+# every band: < 0.7, 0.7-0.8, 0.8-0.85, 0.85-0.9, >= 0.9
+_SIMILARITY_BANDS = (0.7, 0.8, 0.85, 0.9)
+_CRITICALITY_BY_BAND = ("low", "medium", "medium", "high", "high")
+_CLASSIFICATION_BY_BAND = ("new", "related", "related", "duplicate", "duplicate")
+_REUSE_TYPE_BY_BAND = ("minimal", "reference", "adapt", "adapt", "direct")
+
+
+def _build_analysis(issue_id, primary_category, ids, metadatas, distances):
+    """Turn one row of a Chroma query result into the analysis payload."""
+    # Candidates other than the issue itself (self-match, by Chroma id), scored
+    # from Chroma's distances
+    candidates = [i for i, candidate_id in enumerate(ids) if candidate_id != issue_id]
+    similarities = [chroma.distance_to_similarity(distances[i]) for i in candidates]
+    # Chroma's HNSW index returns neighbours nearest first, so candidates are
+    # already in descending similarity order and the best match is the first.
+    max_similarity = similarities[0] if similarities else 0.0
+    
+    # Extract the top 5 similar issues
+    similar_issues = []
+    for i, similarity in zip(candidates, similarities):
+        # Only include issues with meaningful similarity (>= 50%)
+        if similarity < 0.5 or len(similar_issues) == 5:
+            break
+        metadata = metadatas[i]
+        similar_issues.append({
+            "id": ids[i],
+            "number": metadata.get("number"),
+            "title": metadata.get("title"),
+            "similarity": round(similarity, 3)
+        })
+    
+    # Use the categorizer result instead of simple keyword matching
+    issue_type = primary_category
+    
+    # Determine criticality, classification and reuse type from one band lookup
+    band = bisect.bisect_right(_SIMILARITY_BANDS, max_similarity)
+    criticality = _CRITICALITY_BY_BAND[band]
+    classification = _CLASSIFICATION_BY_BAND[band]
+    reuse_type = _REUSE_TYPE_BY_BAND[band]
+    
+    return {
+        "ai_analysis": {
+            "type": issue_type,  # Now uses categorizer result (bug, feature, documentation, etc.)
+            "criticality": criticality,
+            "confidence": round(max_similarity, 2),
+            "similar_issues": similar_issues  # Now populated with actual similar issues
+        },
+        "duplicate_info": {
+            "classification": classification,
+            "similarity": round(max_similarity, 2),
+            "reuse_type": reuse_type
+        }
+    }
+
 
 def analyze_single_issue(owner, repo, issue):
+    cache_key = _analysis_key(owner, repo, issue)
+    cached = _cached_analysis(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         title = issue.get("title", "")
         body = issue.get("body", "")
-        issue_id = str(issue.get("id", ""))
         
         # Categorize the issue
-        category_info = categorizer.categorize(title, body)
-        primary_category = category_info["primary_category"]
+        primary_category = categorizer.primary_category_only(build_issue_text(title, body))
         
         # Create embedding with category
         embedding = embedder.embed_issue_with_category(title, body, primary_category)
-        # Get count for this specific repository
-        count = chroma.count(owner, repo)
-        
-        if count <= 1:  # Only current issue exists in this repo
-            return {
-                "ai_analysis": {"type": primary_category, "criticality": "low", "confidence": 0, "similar_issues": []},
-                "duplicate_info": {"classification": "new", "similarity": 0, "reuse_type": "minimal"}
-            }
         
+        # Chroma caps n_results at the collection size, so the row length
+        # doubles as the repo's issue count without a separate count() call
         results = chroma.query(
             owner=owner,
             repo=repo,
             embedding=embedding,
-            limit=min(10, count)  # Get more results to filter
+            limit=10  # Get more results to filter
         )
+        if len(results["ids"][0]) <= 1:  # Only current issue exists in this repo
+            return _new_issue_analysis(primary_category)
         
-        max_similarity = 0.0
-        if results["embeddings"] and len(results["embeddings"][0]) > 0:
-            for i in range(len(results["embeddings"][0])):
-                # Skip if this is the same issue (self-match)
-                if results["metadatas"][0][i].get("title") == title:
-                    continue
-                    
-                sim_embedding = results["embeddings"][0][i]
-                if sim_embedding is not None:
-                    similarity = cosine_similarity(embedding, sim_embedding)
-                    max_similarity = max(max_similarity, similarity)
-        
-        
-        # Extract similar issues from query results
-        similar_issues = []
-        if results["embeddings"] and len(results["embeddings"][0]) > 0:
-            for i in range(len(results["embeddings"][0])):
-                metadata = results["metadatas"][0][i]
-                
-                # Skip if this is the same issue (self-match)
-                if metadata.get("title") == title:
-                    continue
-                
-                sim_embedding = results["embeddings"][0][i]
-                if sim_embedding is not None:
-                    similarity = cosine_similarity(embedding, sim_embedding)
-                    
-                    # Only include issues with meaningful similarity (>= 50%)
-                    if similarity >= 0.5:
-                        similar_issues.append({
-                            "id": results["ids"][0][i],
-                            "number": metadata.get("number"),
-                            "title": metadata.get("title"),
-                            "similarity": round(similarity, 3)
-                        })
-        
-        # Sort by similarity (highest first) and take top 5
-        similar_issues.sort(key=lambda x: x["similarity"], reverse=True)
-        similar_issues = similar_issues[:5]
-        
-        # Use the categorizer result instead of simple keyword matching
-        issue_type = primary_category  # Already calculated from categorizer on line 30
-        criticality = "high" if max_similarity >= 0.85 else "medium" if max_similarity >= 0.7 else "low"
-        
-        # Determine classification and reuse type
-        classification = "duplicate" if max_similarity >= 0.85 else "related" if max_similarity >= 0.7 else "new"
-        reuse_type = "direct" if max_similarity >= 0.9 else "adapt" if max_similarity >= 0.8 else "reference" if max_similarity >= 0.7 else "minimal"
-        
-        return {
-            "ai_analysis": {
-                "type": issue_type,  # Now uses categorizer result (bug, feature, documentation, etc.)
-                "criticality": criticality,
-                "confidence": round(max_similarity, 2),
-                "similar_issues": similar_issues  # Now populated with actual similar issues
-            },
-            "duplicate_info": {
-                "classification": classification,
-                "similarity": round(max_similarity, 2),
-                "reuse_type": reuse_type
-            }
-        }
+        result = _build_analysis(
+            str(issue.get("id", "")), primary_category,
+            results["ids"][0], results["metadatas"][0], results["distances"][0],
+        )
+        _store_analysis(cache_key, result)
+        return result
     except Exception as e:
         print(f"❌ ERROR in analyze_single_issue: {str(e)}")
         traceback.print_exc()
-        return {
-            "ai_analysis": {"type": "unknown", "criticality": "unknown", "confidence": 0, "similar_issues": []},
-            "duplicate_info": {"classification": "unknown", "similarity": 0, "reuse_type": "minimal"}
-        }
+        return _failed_analysis()
 
 
+def analyze_issues_batch(owner, repo, issues):
+    """
+    Analyze many issues of one repository with a single batched embedding
+    pass and a single Chroma query, instead of one round of each per issue.
+    An issue's "category", when present, is used instead of re-running the
+    categorizer.
+    """
+    if not issues:
+        return []
+    keys = [_analysis_key(owner, repo, issue) for issue in issues]
+    analyses = [_cached_analysis(key) for key in keys]
+    pending = [i for i, analysis in enumerate(analyses) if analysis is None]
+    if not pending:
+        return analyses
+    try:
+        titles = [issues[i].get("title", "") for i in pending]
+        bodies = [issues[i].get("body", "") or "" for i in pending]
+        # Callers that already categorized the issue pass it as "category"
+        categories = [
+            issues[i].get("category") or categorizer.primary_category_only(build_issue_text(title, body))
+            for i, title, body in zip(pending, titles, bodies)
+        ]
+        
+        count = chroma.count(owner, repo)
+        if count <= 1:
+            for i, category in zip(pending, categories):
+                analyses[i] = _new_issue_analysis(category)
+            return analyses
+        
+        embeddings = embedder.embed_texts([
+            categorizer.enhance_text_for_embedding(title, body, category)
+            for title, body, category in zip(titles, bodies, categories)
+        ])
+        results = chroma.query_many(owner, repo, embeddings, limit=min(10, count))
+        for i, category, ids, metadatas, distances in zip(
+            pending, categories, results["ids"], results["metadatas"], results["distances"]
+        ):
+            analyses[i] = _build_analysis(str(issues[i].get("id", "")), category, ids, metadatas, distances)
+            _store_analysis(keys[i], analyses[i])
+        return analyses
+    except Exception as e:
+        print(f"❌ ERROR in analyze_issues_batch: {str(e)}")
+        traceback.print_exc()
+        return [analysis or _failed_analysis() for analysis in analyses]
+
 import traceback
 
+
+def _index_new_issues(owner, repo, docs):
+    """
+    Store the issues ChromaDB does not have yet. `docs` is a list of
+    (issue_id, metadata); one existence lookup, one embedding pass and one
+    upsert cover the whole list.
+    """
+    existing = chroma.existing_ids(owner, repo, [issue_id for issue_id, _ in docs])
+    missing = [(issue_id, metadata) for issue_id, metadata in docs if issue_id not in existing]
+    if not missing:
+        return
+    forget_analyses(owner, repo)
+    metadatas = [metadata for _, metadata in missing]
+    embeddings = embedder.embed_issues_with_category(
+        [m["title"] for m in metadatas],
+        [m["body"] for m in metadatas],
+        [m["category"] for m in metadatas],
+    )
+    chroma.add_issues(owner, repo, [issue_id for issue_id, _ in missing], embeddings, metadatas)
+
+
+def _process_page(owner, repo, issues, limit):
+    """
+    Categorize, index and analyze up to `limit` issues (PRs skipped) of one
+    GitHub page. Blocking: embeddings, ChromaDB and the categorizer.
+    """
+    page_issues = []
+    index_docs = []
+    for issue in issues:
+        if "pull_request" in issue:
+            continue  # Skip pull requests
+
+        title = issue.get("title", "")
+        body = issue.get("body", "") or ""
+        issue_id = str(issue["id"])
+
+        # Categorize the issue
+        category_info = categorizer.categorize(build_issue_text(title, body))
+        primary_category = category_info.primary_category
+        categories = category_info.categories
+        confidence = category_info.confidence
+
+        # Stored in ChromaDB below, with the rest of the page
+        index_docs.append((issue_id, {
+            "number": issue["number"],
+            "title": title,
+            "body": body,
+            "repo": f"{owner}/{repo}",
+            "category": primary_category,
+            "categories": ",".join(categories),
+            "category_confidence": confidence,
+        }))
+
+        page_issues.append({
+            "id": issue["id"],
+            "number": issue["number"],
+            "title": title,
+            "body": body,
+            "state": issue["state"],
+            "created_at": issue["created_at"],
+            "updated_at": issue["updated_at"],
+            "labels": [l["name"] for l in issue.get("labels", [])],
+            "category": primary_category,
+        })
+        
+        # Stop if we have enough issues
+        if len(page_issues) >= limit:
+            break
+
+    _index_new_issues(owner, repo, index_docs)
+
+    # Analyze the whole page with one batched embed + Chroma query
+    analyses = analyze_issues_batch(owner, repo, page_issues)
+    for entry, analysis_result in zip(page_issues, analyses):
+        entry["ai_analysis"] = analysis_result["ai_analysis"]
+        entry["duplicate_info"] = analysis_result["duplicate_info"]
+    return page_issues
+
+
 @router.get("/issues/{owner}/{repo}")
-def fetch_issues(owner: str, repo: str, user_token: str = None, page: int = 1, per_page: int = 30):
+async def fetch_issues(owner: str, repo: str, user_token: str = None, page: int = 1, per_page: int = 30):
     """
     Fetch issues with pagination, ensuring we return exactly per_page issues (excluding PRs).
     May need to fetch multiple GitHub pages to achieve this.
@@ -135,7 +313,9 @@ def fetch_issues(owner: str, repo: str, user_token: str = None, page: int = 1, p
         
         # Keep fetching until we have enough issues or run out of pages
         while len(cleaned) < per_page and has_more:
-            result = github_fetcher.get_issues(owner, repo, user_token, current_github_page, per_page)
+            result = await asyncio.to_thread(
+                github_fetcher.get_issues, owner, repo, user_token, current_github_page, per_page
+            )
             issues = result["issues"]
             pagination_info = result["pagination"]
             
@@ -146,69 +326,15 @@ def fetch_issues(owner: str, repo: str, user_token: str = None, page: int = 1, p
             total_items_fetched += len(issues)
             pages_fetched += 1
             
-            for issue in issues:
-                if "pull_request" in issue:
-                    continue  # Skip pull requests
-
-                title = issue.get("title", "")
-                body = issue.get("body", "") or ""
-                issue_id = str(issue["id"])
-
-                # Categorize the issue
-                category_info = categorizer.categorize(title, body)
-                primary_category = category_info["primary_category"]
-                categories = category_info["categories"]
-                confidence = category_info["confidence"]
-
-                # Store in ChromaDB if not exists
-                if not chroma.issue_exists(owner, repo, issue_id):
-                    embedding = embedder.embed_issue_with_category(title, body, primary_category)
-                    chroma.add_issue(
-                        owner=owner,
-                        repo=repo,
-                        issue_id=issue_id,
-                        embedding=embedding,
-                        metadata={
-                            "number": issue["number"],
-                            "title": title,
-                            "body": body,
-                            "repo": f"{owner}/{repo}",
-                            "category": primary_category,
-                            "categories": ",".join(categories),
-                            "category_confidence": confidence,
-                        },
-                    )
-
-                # Analyze each issue
-                analysis_result = analyze_single_issue(owner, repo, {
-                    "id": issue["id"],
-                    "title": title,
-                    "body": body
-                })
-
-                cleaned.append({
-                    "id": issue["id"],
-                    "number": issue["number"],
-                    "title": title,
-                    "body": body,
-                    "state": issue["state"],
-                    "created_at": issue["created_at"],
-                    "updated_at": issue["updated_at"],
-                    "labels": [l["name"] for l in issue.get("labels", [])],
-                    "category": primary_category,
-                    "ai_analysis": analysis_result["ai_analysis"],
-                    "duplicate_info": analysis_result["duplicate_info"]
-                })
-                
-                # Stop if we have enough issues
-                if len(cleaned) >= per_page:
-                    break
+            cleaned.extend(
+                await asyncio.to_thread(_process_page, owner, repo, issues, per_page - len(cleaned))
+            )
             
             # Check if there are more pages
             has_more = pagination_info.get("has_next", False)
             current_github_page += 1
 
-        print(f"📦 Chroma issue count for {owner}/{repo}:", chroma.count(owner, repo))
+        print(f"📦 Chroma issue count for {owner}/{repo}:", await asyncio.to_thread(chroma.count, owner, repo))
         print(f"📊 Fetched {total_items_fetched} items from {pages_fetched} GitHub page(s), filtered to {len(cleaned)} issues")
         
         # Calculate if there are more issues available
@@ -256,10 +382,9 @@ def fetch_repo(owner: str, repo: str, request: Request):
     
     # Extract user_id from auth token if available
     user_id = None
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
+    token = bearer_token(request)
+    if token:
         try:
-            token = auth_header.split(" ")[1]
             payload = auth_service.verify_token(token)
             if payload:
                 user_id = payload.get("sub")
@@ -281,7 +406,12 @@ def fetch_repo(owner: str, repo: str, request: Request):
         "user_id": user_id,  # Add user_id
     }
 
-    # ✅ UPSERT (insert if not exists) - unique per user
+    # ✅ UPSERT (insert if not exists) - unique per user. Repeat visits within
+    # the TTL return the same (cached) details, so the write is skipped.
+    upsert_key = (data["full_name"], user_id)
+    with _RECENT_REPO_UPSERTS_LOCK:
+        if upsert_key in _RECENT_REPO_UPSERTS:
+            return repo_doc
     repos_collection.update_one(
         {"full_name": data["full_name"], "user_id": user_id},
         {
@@ -290,17 +420,16 @@ def fetch_repo(owner: str, repo: str, request: Request):
         },
         upsert=True,
     )
+    with _RECENT_REPO_UPSERTS_LOCK:
+        _RECENT_REPO_UPSERTS[upsert_key] = True
 
     return repo_doc
 
 
 
 @router.get("/rate-limit")
-def rate_limit():
-    res = requests.get(
-        "https://api.github.com/rate_limit",
-        headers=github_fetcher._headers(),
-    )
+async def rate_limit():
+    res = await _http.get("/rate_limit", headers=github_fetcher.headers)
 
     if res.status_code != 200:
         raise HTTPException(
@@ -318,13 +447,12 @@ def get_saved_repos(request: Request):
     from app.auth.auth_service import auth_service
     
     # Extract token from Authorization header
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
+    token = bearer_token(request)
+    if not token:
         # Return empty list if not authenticated (don't require auth for backward compatibility)
         return []
     
     try:
-        token = auth_header.split(" ")[1]
         payload = auth_service.verify_token(token)
         
         if not payload:
@@ -574,8 +702,8 @@ def _resolve_github_token(request) -> str:
       3. users.oauth_providers[].access_token       (if stored there)
     Raises HTTPException on any failure.
     """
-    auth_header = request.headers.get("Authorization", "")
-    if not auth_header.startswith("Bearer "):
+    jwt_token = bearer_token(request)
+    if not jwt_token:
         raise HTTPException(
             status_code=401,
             detail="Not authenticated. Please sign in to post comments."
@@ -585,7 +713,6 @@ def _resolve_github_token(request) -> str:
     from app.db.mongo import db as _db
     from bson import ObjectId
 
-    jwt_token = auth_header.split(" ", 1)[1]
     payload = auth_service.verify_token(jwt_token)
     if not payload:
         raise HTTPException(
@@ -70,6 +70,7 @@ class GenerateSolutionRequest(BaseModel):
     owner: str
     repo: str
     user_token: str | None = None   # optional GitHub OAuth token for private repos
+    fresh: bool = False             # regenerate: skip both the MongoDB and the GPT response cache
 
 
 # ─────────────────────────────────────────
@@ -80,13 +81,13 @@ class GenerateSolutionRequest(BaseModel):
 async def generate_solution(payload: GenerateSolutionRequest):
     """
     Generate an AI solution for a GitHub issue using GPT-4o-mini.
-    1. Returns a cached result if one already exists.
+    1. Returns a cached result if one already exists (unless `fresh` is set).
     2. Otherwise: searches the repo for relevant source files, feeds them to GPT,
        and saves the result (with file_path / code_before / code_after) to MongoDB.
     """
     try:
         # ── 1. Check MongoDB cache ──────────────────────────────────────────
-        existing = await solutions.find_one(
+        existing = None if payload.fresh else await solutions.find_one(
             {"issue_id": payload.issue_id},
             {"_id": 0}
         )
@@ -130,13 +131,14 @@ async def generate_solution(payload: GenerateSolutionRequest):
 
         # ── 3. Generate via GPT-4o-mini ─────────────────────────────────────
         logger.info(f"🤖 Generating GPT solution for issue {payload.issue_id}...")
-        solution = generate_with_code_context(
+        solution = await generate_with_code_context(
             issue_id=payload.issue_id,
             title=payload.title,
             body=payload.body,
             owner=payload.owner,
             repo=payload.repo,
             code_chunks=code_chunks,
+            fresh=payload.fresh,
         )
 
         # ── 4. Enrich with metadata and persist ─────────────────────────────
@@ -146,7 +148,8 @@ async def generate_solution(payload: GenerateSolutionRequest):
         solution["created_at"] = datetime.now(timezone.utc).isoformat()
         solution["had_code_context"] = bool(code_chunks)
 
-        await solutions.insert_one({**solution})
+        # A `fresh` request overwrites the stored solution instead of adding a second one
+        await solutions.replace_one({"issue_id": payload.issue_id}, solution, upsert=True)
 
         logger.info(f"✅ Solution saved to MongoDB for issue {payload.issue_id}")
         return {"cached": False, "solution": solution}
@@ -62,8 +62,10 @@ async def _stream_issues_from_github(owner: str, repo: str, user_token: str | No
             # Minimal categorization (fast, pure Python — no embeddings)
             try:
                 from app.ai.categorizer import categorizer as _cat
-                cat_info = _cat.categorize(issue.get("title", ""), issue.get("body", "") or "")
-                category = cat_info.get("primary_category", "general")
+                from app.ai.issue_text import build_issue_text
+                category = _cat.primary_category_only(
+                    build_issue_text(issue.get("title", ""), issue.get("body", "") or "")
+                )
             except Exception:
                 category = "general"
 
@@ -19,6 +19,8 @@ from fastapi import APIRouter, Request, HTTPException, Header
 from typing import Optional
 
 from app.db.mongo import cached_repositories, cached_issues
+from app.api.analytics import forget_summary
+from app.api.github import forget_analyses
 from app.services.cache_service import CacheService
 
 logger = logging.getLogger(__name__)
@@ -110,6 +112,8 @@ async def github_webhook(
                 "repository_id": repo_doc["_id"],
                 "number": issue_data.get("number")
             })
+            forget_summary(owner, repo_name)
+            forget_analyses(owner, repo_name)
             # Best-effort ChromaDB cleanup
             try:
                 from app.core.chroma_manager import chroma_manager
@@ -130,6 +134,7 @@ async def github_webhook(
 
         issue_doc = {
             "repository_id": repo_doc["_id"],
+            "id": issue_data.get("id"),
             "number": issue_data["number"],
             "title": issue_data.get("title", ""),
             "body": issue_data.get("body", "") or "",
@@ -151,6 +156,8 @@ async def github_webhook(
             {"$set": issue_doc},
             upsert=True
         )
+        forget_summary(owner, repo_name)
+        forget_analyses(owner, repo_name)
 
         # Embed into ChromaDB so similarity search stays current
         import asyncio
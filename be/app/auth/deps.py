@@ -0,0 +1,53 @@
+"""
+FastAPI dependencies for optional JWT authentication.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Dict, Optional
+
+from cachetools import TTLCache
+from fastapi import Request
+
+from app.auth.auth_service import auth_service
+
+# Verified JWT payloads per token, so polling clients skip the signature
+# check on every request. Entries never outlive the token's own expiry.
+_PAYLOAD_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=30)
+_PAYLOAD_CACHE_LOCK = threading.Lock()
+
+
+def token_key(token: str) -> bytes:
+    """Fixed-size cache key for a token, so caches don't hold raw JWTs."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def verify_token_cached(token: str) -> Optional[Dict]:
+    """`auth_service.verify_token` memoised for a short TTL; invalid tokens are not cached."""
+    key = token_key(token)
+    with _PAYLOAD_CACHE_LOCK:
+        payload = _PAYLOAD_CACHE.get(key)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+
+    payload = auth_service.verify_token(token)
+    if payload:
+        with _PAYLOAD_CACHE_LOCK:
+            _PAYLOAD_CACHE[key] = payload
+    return payload
+
+
+def bearer_token(request: Request) -> Optional[str]:
+    """Token from an `Authorization: Bearer <token>` header, or None."""
+    auth_header = request.headers.get("Authorization", "")
+    return auth_header[7:] if auth_header.startswith("Bearer ") else None
+
+
+async def current_user_id(request: Request) -> Optional[str]:
+    """User id (`sub`) from a Bearer JWT, or None for anonymous / invalid tokens."""
+    token = bearer_token(request)
+    if not token:
+        return None
+    payload = verify_token_cached(token)
+    return payload.get("sub") if payload else None
@@ -4,11 +4,20 @@ OAuth provider integrations (Google and GitHub).
 
 import os
 import secrets
-import requests
+import httpx
 from typing import Optional, Dict, Tuple
 from app.auth.models import User, OAuthProvider
-from app.db.mongo import get_database
-from datetime import datetime
+from app.db.mongo import OAUTH_STATE_TTL_SECONDS, get_database
+from datetime import datetime, timedelta
+
+
+# Shared client for provider calls, so logins reuse pooled TLS connections;
+# closed on app shutdown (see main.lifespan)
+_http = httpx.AsyncClient(timeout=10.0)
+
+
+async def close_http_client():
+    await _http.aclose()
 
 
 class OAuthProviders:
@@ -17,6 +26,9 @@ class OAuthProviders:
     def __init__(self):
         self.db = get_database()
         self.users_collection = self.db["users"]
+        # Pending OAuth states live in Mongo so any worker can verify the callback;
+        # their TTL index is created by ensure_indexes()
+        self.states_collection = self.db["oauth_states"]
         
         # Google OAuth configuration
         self.google_client_id = os.getenv("GOOGLE_CLIENT_ID")
@@ -32,6 +44,23 @@ class OAuthProviders:
         """Generate a random state token for OAuth."""
         return secrets.token_urlsafe(32)
     
+    def save_oauth_state(self, state: str, provider: str) -> None:
+        """Remember a state until its callback; Mongo's TTL index drops abandoned ones."""
+        self.states_collection.insert_one(
+            {"_id": state, "provider": provider, "created_at": datetime.utcnow()}
+        )
+    
+    def consume_oauth_state(self, state: str, provider: str) -> bool:
+        """
+        Atomically check and delete a state, so it can be used only once.
+        Expiry is checked here too, since the TTL monitor only runs every minute.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=OAUTH_STATE_TTL_SECONDS)
+        doc = self.states_collection.find_one_and_delete(
+            {"_id": state, "provider": provider, "created_at": {"$gt": cutoff}}
+        )
+        return doc is not None
+    
     def get_google_auth_url(self, state: str) -> str:
         """Get Google OAuth authorization URL."""
         params = {
@@ -59,7 +88,7 @@ class OAuthProviders:
         query_string = "&".join([f"{k}={v}" for k, v in params.items()])
         return f"https://github.com/login/oauth/authorize?{query_string}"
     
-    def exchange_google_code(self, code: str) -> Dict:
+    async def exchange_google_code(self, code: str) -> Dict:
         """Exchange Google authorization code for tokens."""
         token_url = "https://oauth2.googleapis.com/token"
         data = {
@@ -70,18 +99,18 @@ class OAuthProviders:
             "grant_type": "authorization_code"
         }
         
-        response = requests.post(token_url, data=data)
+        response = await _http.post(token_url, data=data)
         response.raise_for_status()
         return response.json()
     
-    def get_google_user_info(self, access_token: str) -> Dict:
+    async def get_google_user_info(self, access_token: str) -> Dict:
         """Get Google user information."""
         headers = {"Authorization": f"Bearer {access_token}"}
-        response = requests.get("https://www.googleapis.com/oauth2/v2/userinfo", headers=headers)
+        response = await _http.get("https://www.googleapis.com/oauth2/v2/userinfo", headers=headers)
         response.raise_for_status()
         return response.json()
     
-    def exchange_github_code(self, code: str) -> Dict:
+    async def exchange_github_code(self, code: str) -> Dict:
         """Exchange GitHub authorization code for tokens."""
         token_url = "https://github.com/login/oauth/access_token"
         data = {
@@ -92,20 +121,28 @@ class OAuthProviders:
         }
         headers = {"Accept": "application/json"}
         
-        response = requests.post(token_url, data=data, headers=headers)
+        response = await _http.post(token_url, data=data, headers=headers)
         response.raise_for_status()
         return response.json()
     
-    def get_github_user_info(self, access_token: str) -> Dict:
+    async def get_github_user_info(self, access_token: str) -> Dict:
         """Get GitHub user information."""
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Accept": "application/json"
         }
-        response = requests.get("https://api.github.com/user", headers=headers)
+        response = await _http.get("https://api.github.com/user", headers=headers)
         response.raise_for_status()
         return response.json()
     
+    async def get_github_primary_email(self, access_token: str) -> Optional[str]:
+        """Primary email of a GitHub user whose email is not public."""
+        headers = {"Authorization": f"Bearer {access_token}"}
+        response = await _http.get("https://api.github.com/user/emails", headers=headers)
+        emails = response.json()
+        primary_email = next((e for e in emails if e.get("primary")), None)
+        return primary_email["email"] if primary_email else None
+    
     def find_or_create_oauth_user(self, provider: str, provider_user_id: str, 
                                    email: str, user_info: Dict) -> User:
         """Find existing user or create new user from OAuth."""
@@ -1,5 +1,7 @@
 import os
-from pymongo import MongoClient
+import logging
+from pymongo import ASCENDING, DESCENDING, MongoClient
+from pymongo.errors import PyMongoError
 from motor.motor_asyncio import AsyncIOMotorClient
 
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
@@ -22,7 +24,50 @@ cached_issues = async_db["cached_issues"]
 solutions = async_db["solutions"]
 # ✅ Tracks which repos have been source-code indexed (and last commit SHA)
 code_file_index = async_db["code_file_index"]
+# ✅ Pending OAuth states, so any worker can verify a login callback
+oauth_states = async_db["oauth_states"]
 
+# How long a login may take between /auth/<provider> and the code exchange
+OAUTH_STATE_TTL_SECONDS = 600
+
+
+logger = logging.getLogger(__name__)
+
+
+# (collection, keys, options) for every index the issue cache and OAuth logins rely on.
+# Every issue lookup filters by repository first, then by number, state/date
+# or an AI field, so each issue index leads with repository_id.
+_INDEXES = [
+    (cached_repositories, [("owner", ASCENDING), ("name", ASCENDING)], {}),
+    # list_repositories: {$or: [{user_ids}, {synced_by_user_id}]} sorted by last_synced
+    (cached_repositories, [("user_ids", ASCENDING), ("last_synced", DESCENDING)], {}),
+    (cached_repositories, [("synced_by_user_id", ASCENDING)], {"sparse": True}),
+    (cached_issues, [("repository_id", ASCENDING), ("number", ASCENDING)], {"unique": True}),
+    (cached_issues, [("repository_id", ASCENDING), ("state", ASCENDING), ("created_at", ASCENDING)], {}),
+    # The cached issue list sorts by number desc; equality filters go first (ESR)
+    (cached_issues, [("repository_id", ASCENDING), ("state", ASCENDING), ("number", DESCENDING)], {}),
+    (cached_issues, [("repository_id", ASCENDING), ("category", ASCENDING), ("number", DESCENDING)], {}),
+    (cached_issues, [("repository_id", ASCENDING), ("duplicate_info.classification", ASCENDING)], {}),
+    (cached_issues, [("repository_id", ASCENDING), ("ai_analysis.type", ASCENDING)], {}),
+    # Only analyzed issues carry a criticality
+    (
+        cached_issues,
+        [("repository_id", ASCENDING), ("ai_analysis.criticality", ASCENDING)],
+        {"partialFilterExpression": {"ai_analysis.criticality": {"$exists": True}}},
+    ),
+    # Mongo drops abandoned OAuth states on its own
+    (oauth_states, [("created_at", ASCENDING)], {"expireAfterSeconds": OAUTH_STATE_TTL_SECONDS}),
+]
+
+
+async def ensure_indexes():
+    """Create the issue-cache and OAuth-state indexes (idempotent); called from the app lifespan."""
+    for collection, keys, options in _INDEXES:
+        try:
+            await collection.create_index(keys, **options)
+        except PyMongoError as e:
+            # e.g. duplicate (repository_id, number) pairs left over in an old cache
+            logger.error(f"Could not create index {keys} on {collection.name}: {e}")
 
 
 def get_database():
@@ -1,10 +1,14 @@
 from dotenv import load_dotenv
 load_dotenv()
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
 
 from app.api import github, analysis, solution, oauth, streaming, auth, cache, analytics, ai_features
+from app.auth.oauth_providers import close_http_client as close_oauth_http_client
+from app.db.mongo import ensure_indexes
 from app.middleware.error_handlers import register_exception_handlers
 from app.middleware.logging import log_requests_middleware
 
@@ -14,10 +18,23 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_indexes()
+    yield
+    await ai_features.close_http_client()
+    await github.close_http_client()
+    await close_oauth_http_client()
+
+
 app = FastAPI(
     title="Git IntelliSolve API",
     version="1.0.0",
-    description="AI-powered GitHub issue analysis and duplicate detection system"
+    description="AI-powered GitHub issue analysis and duplicate detection system",
+    lifespan=lifespan,
+    # orjson renders the large analytics / issue payloads several times faster
+    default_response_class=ORJSONResponse,
 )
 
 # -----------------------------
@@ -195,13 +195,16 @@ class CacheService:
                     analysis = await self._analyze_issue(owner, repo, issue_data)
                     
                     # Prepare issue document
+                    created_at = datetime.fromisoformat(issue_data["created_at"].replace("Z", "+00:00"))
                     issue_doc = {
                         "repository_id": repo_doc["_id"],
+                        "id": issue_data.get("id"),  # GitHub's global id, keys stored solutions
                         "number": issue_data["number"],
                         "title": issue_data["title"],
                         "body": issue_data.get("body") or "",  # Handle None
                         "state": issue_data["state"],
-                        "created_at": datetime.fromisoformat(issue_data["created_at"].replace("Z", "+00:00")),
+                        "created_at": created_at,
+                        "created_ts": int(created_at.timestamp()),  # epoch seconds, for cheap age math
                         "updated_at": datetime.fromisoformat(issue_data["updated_at"].replace("Z", "+00:00")),
                         "user": issue_data.get("user") or {},  # Handle None
                         "labels": issue_data.get("labels") or [],  # Handle None
@@ -233,6 +236,10 @@ class CacheService:
                 {"_id": repo_doc["_id"]},
                 {"$set": {"last_synced": datetime.utcnow()}}
             )
+            from app.api.analytics import forget_summary
+            from app.api.github import forget_analyses
+            forget_summary(owner, repo)
+            forget_analyses(owner, repo)
             
             logger.info(f"Sync complete: stored {stored_count}/{len(issues)} issues, failed: {failed_count}")
 
@@ -350,8 +357,8 @@ class CacheService:
         # ── STEP 1: Categorize (pure Python — never fails silently) ────────
         try:
             from app.ai.categorizer import categorizer
-            category_info = categorizer.categorize(title, body)
-            issue_type = category_info["primary_category"]
+            from app.ai.issue_text import build_issue_text
+            issue_type = categorizer.primary_category_only(build_issue_text(title, body))
             category = issue_type
         except Exception as e:
             logger.error(f"Categorizer failed for issue #{issue_data.get('number')}: {e}")
@@ -430,7 +437,9 @@ class CacheService:
                     {"synced_by_user_id": user_id},
                 ]
             }
-            repos = await cached_repositories.find(query).sort("last_synced", -1).to_list(length=None)
+            repos = await cached_repositories.find(
+                query, {"owner": 1, "name": 1, "last_synced": 1, "created_at": 1}
+            ).sort("last_synced", -1).to_list(length=None)
             
             result = []
             for repo in repos:
@@ -488,6 +497,12 @@ class CacheService:
             
             # Delete repository document
             await cached_repositories.delete_one({"_id": repo_doc["_id"]})
+            from app.api.ai_features import forget_repo_id
+            from app.api.analytics import forget_summary
+            from app.api.github import forget_analyses
+            forget_repo_id(owner, repo)
+            forget_summary(owner, repo)
+            forget_analyses(owner, repo)
             
             # Delete from ChromaDB
             try:
@@ -158,9 +158,8 @@ def index_repository(
     try:
         import chromadb
         from chromadb.config import Settings
-        from app.vector.embeddings import EmbeddingService
+        from app.core.embedder import embedder as embedder_svc
 
-        embedder_svc = EmbeddingService()
         chroma_client = chromadb.Client(
             Settings(persist_directory="./chroma", anonymized_telemetry=False)
         )
@@ -194,7 +193,7 @@ def index_repository(
         try:
             ids = [c["chunk_id"] for c in chunks]
             texts = [c["content"] for c in chunks]
-            embeddings = [embedder_svc.embed_text(t) for t in texts]
+            embeddings = embedder_svc.embed_texts(texts)
             metadatas = [
                 {"owner": owner, "repo": repo, "path": c["path"], "chunk_index": c["chunk_index"]}
                 for c in chunks
@@ -232,9 +231,8 @@ def search_code(
     try:
         import chromadb
         from chromadb.config import Settings
-        from app.vector.embeddings import EmbeddingService
+        from app.core.embedder import embedder as embedder_svc
 
-        embedder_svc = EmbeddingService()
         chroma_client = chromadb.Client(
             Settings(persist_directory="./chroma", anonymized_telemetry=False)
         )
@@ -1,6 +1,8 @@
 import os
+import hashlib
+import threading
 import requests
-from functools import lru_cache
+from cachetools import LRUCache, TTLCache
 
 
 class GitHubFetcher:
@@ -11,8 +13,20 @@ class GitHubFetcher:
             "Authorization": f"Bearer {self.token}",
             "Accept": "application/vnd.github.v3+json",
         }
+        # Keep-alive connection pool shared by every request below
+        self._session = requests.Session()
+        # (owner, repo, page, per_page, token hash) -> (etag, issues, link header)
+        # for conditional GETs; a 304 doesn't count against the rate limit.
+        self._issue_pages = LRUCache(maxsize=2048)
+        # (owner, repo, token hash) -> repo details; stars / description change rarely
+        self._repos = TTLCache(maxsize=1024, ttl=60)
+        self._cache_lock = threading.Lock()
+
+    @staticmethod
+    def _token_hash(headers: dict) -> bytes:
+        # Responses (and ETags) vary with the Authorization header
+        return hashlib.blake2b(headers["Authorization"].encode(), digest_size=8).digest()
 
-    @lru_cache(maxsize=100)
     def get_repo(self, owner: str, repo: str, user_token: str = None):
         """
         Fetch repository details. Optionally use user's OAuth token for private repos.
@@ -28,11 +42,20 @@ class GitHubFetcher:
         headers = self.headers.copy()
         if user_token:
             headers["Authorization"] = f"Bearer {user_token}"
+        
+        cache_key = (owner, repo, self._token_hash(headers))
+        with self._cache_lock:
+            data = self._repos.get(cache_key)
+        if data is not None:
+            return data
             
         url = f"{self.base_url}/repos/{owner}/{repo}"
-        res = requests.get(url, headers=headers)
+        res = self._session.get(url, headers=headers)
         res.raise_for_status()
-        return res.json()
+        data = res.json()
+        with self._cache_lock:
+            self._repos[cache_key] = data
+        return data
 
     def check_repo_visibility(self, owner: str, repo: str, user_token: str = None):
         """
@@ -52,12 +75,12 @@ class GitHubFetcher:
             headers["Authorization"] = f"Bearer {user_token}"
         
         url = f"{self.base_url}/repos/{owner}/{repo}"
-        res = requests.get(url, headers=headers)
+        res = self._session.get(url, headers=headers)
         
         if res.status_code == 404:
             # Could be private without access or doesn't exist
             # Try with default token to differentiate
-            res_default = requests.get(url, headers=self.headers)
+            res_default = self._session.get(url, headers=self.headers)
             return {
                 "is_private": True,
                 "has_access": False,
@@ -81,17 +104,6 @@ class GitHubFetcher:
                 "repo_exists": False
             }
 
-    def get_repo(self, owner: str, repo: str, user_token: str = None):
-        """Get repository details. Optionally use user's OAuth token for private repos."""
-        headers = self.headers.copy()
-        if user_token:
-            headers["Authorization"] = f"Bearer {user_token}"
-            
-        url = f"{self.base_url}/repos/{owner}/{repo}"
-        res = requests.get(url, headers=headers)
-        res.raise_for_status()
-        return res.json()
-
     def get_issues(self, owner: str, repo: str, user_token: str = None, page: int = 1, per_page: int = 30):
         """
         Get repository issues with pagination support.
@@ -117,13 +129,24 @@ class GitHubFetcher:
             "per_page": min(per_page, 100)  # GitHub API max is 100
         }
         
-        res = requests.get(url, headers=headers, params=params)
-        res.raise_for_status()
+        cache_key = (owner, repo, page, params["per_page"], self._token_hash(headers))
+        with self._cache_lock:
+            cached = self._issue_pages.get(cache_key)
+        if cached:
+            headers["If-None-Match"] = cached[0]
         
-        issues = res.json()
+        res = self._session.get(url, headers=headers, params=params)
+        if res.status_code == 304 and cached:
+            _, issues, link_header = cached
+        else:
+            res.raise_for_status()
+            issues = res.json()
+            link_header = res.headers.get("Link", "")
+            if res.headers.get("ETag"):
+                with self._cache_lock:
+                    self._issue_pages[cache_key] = (res.headers["ETag"], issues, link_header)
         
         # Parse Link header for pagination info
-        link_header = res.headers.get("Link", "")
         has_next = 'rel="next"' in link_header
         has_prev = 'rel="prev"' in link_header
         
@@ -1,8 +1,17 @@
-# app/vector/chroma_client.py
+"""
+app/vector/chroma_client.py
+Per-repository ChromaDB collections of issue embeddings.
+
+Invariant: every vector written here is L2-normalized. Embeddings only come
+from app.ai.embedding (normalize_embeddings=True, on top of the model's own
+Normalize layer), so squared-L2 distance and cosine are interchangeable and
+`distance_to_similarity` needs no per-candidate norms. Keep new write paths
+on EmbeddingService to preserve this.
+"""
 
 import chromadb
 from chromadb.config import Settings
-from typing import Dict, List
+from typing import Dict, List, Set
 
 
 class ChromaStore:
@@ -31,7 +40,11 @@ class ChromaStore:
         Each repository has its own isolated collection.
         """
         collection_name = self._get_collection_name(owner, repo)
-        return self.client.get_or_create_collection(name=collection_name)
+        # Pin the space `distance_to_similarity` assumes (also Chroma's default)
+        return self.client.get_or_create_collection(
+            name=collection_name,
+            metadata={"hnsw:space": "l2"},
+        )
 
     def add_issue(self, owner: str, repo: str, issue_id: str, embedding: List[float], metadata: Dict):
         """
@@ -52,6 +65,19 @@ class ChromaStore:
             documents=[f"{metadata.get('title', '')}\n{metadata.get('body', '')}"],
         )
 
+    def add_issues(self, owner: str, repo: str, issue_ids: List[str], embeddings: List[List[float]], metadatas: List[Dict]):
+        """
+        Add several issues to the repository collection in one upsert.
+        Arguments are parallel lists, as for `add_issue`.
+        """
+        collection = self.get_repo_collection(owner, repo)
+        collection.upsert(
+            ids=issue_ids,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            documents=[f"{m.get('title', '')}\n{m.get('body', '')}" for m in metadatas],
+        )
+
     def query(self, owner: str, repo: str, embedding: List[float], limit: int = 6):
         """
         Query similar issues within the same repository only.
@@ -66,9 +92,30 @@ class ChromaStore:
         return collection.query(
             query_embeddings=[embedding],
             n_results=limit,
-            include=["embeddings", "metadatas"],
+            include=["metadatas", "distances"],
+        )
+
+    def query_many(self, owner: str, repo: str, embeddings: List[List[float]], limit: int = 6):
+        """
+        Query similar issues for several vectors in one call.
+        Result lists hold one row per query embedding, in order.
+        """
+        collection = self.get_repo_collection(owner, repo)
+        return collection.query(
+            query_embeddings=embeddings,
+            n_results=limit,
+            include=["metadatas", "distances"],
         )
 
+    @staticmethod
+    def distance_to_similarity(distance: float) -> float:
+        """
+        Convert a query distance to cosine similarity.
+        Collections use the default squared-L2 space and embeddings are
+        normalized, so d = 2 - 2*cos.
+        """
+        return 1.0 - distance / 2.0
+
     def issue_exists(self, owner: str, repo: str, issue_id: str) -> bool:
         """
         Check if an issue exists in the repository collection.
@@ -80,6 +127,15 @@ class ChromaStore:
         except Exception:
             return False
 
+    def existing_ids(self, owner: str, repo: str, issue_ids: List[str]) -> Set[str]:
+        """
+        Return the subset of `issue_ids` already stored, in one lookup.
+        """
+        if not issue_ids:
+            return set()
+        collection = self.get_repo_collection(owner, repo)
+        return set(collection.get(ids=issue_ids, include=[])["ids"])
+
     def count(self, owner: str, repo: str) -> int:
         """
         Count issues in a specific repository collection.
@@ -91,9 +147,8 @@ class ChromaStore:
         """
         Query similar issues by text within the same repository.
         """
-        from app.vector.embeddings import EmbeddingService
-        embedding_service = EmbeddingService()
-        embedding = embedding_service.embed_text(text)
+        from app.core.embedder import embedder
+        embedding = embedder.embed_text(text)
         return self.query(owner, repo, embedding, limit)
 
     def list_collections(self) -> List[str]:
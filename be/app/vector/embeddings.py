@@ -1,5 +1,5 @@
-import os
-from sentence_transformers import SentenceTransformer
+from app.ai.embedding import embed, encode_many, load_model
+
 
 class EmbeddingService:
     def __init__(self):
@@ -7,26 +7,13 @@ class EmbeddingService:
 
     def _load_model(self):
         if self.model is None:
-            BASE_DIR = os.path.dirname(
-                os.path.dirname(os.path.dirname(__file__))
-            )
-            MODEL_PATH = os.path.join(
-                BASE_DIR, "models", "all-MiniLM-L6-v2"
-            )
-
-            print("✅ Loading SentenceTransformer from:", MODEL_PATH)
-
-            self.model = SentenceTransformer(
-                MODEL_PATH,
-                local_files_only=True
-            )
+            self.model = load_model()
 
         return self.model
 
     def embed_issue(self, title: str, body: str):
         text = f"{title}\n{body}"
-        model = self._load_model()
-        return model.encode(text).tolist()
+        return embed(text).tolist()
     
     def embed_issue_with_category(self, title: str, body: str, category: str):
         """
@@ -40,12 +27,24 @@ class EmbeddingService:
         Returns:
             Embedding vector as list
         """
+        return embed(self._category_text(title, body, category)).tolist()
+
+    def embed_issues_with_category(self, titles: list[str], bodies: list[str], categories: list[str]):
+        """Batched `embed_issue_with_category`: one forward pass for all issues."""
+        return encode_many([
+            self._category_text(title, body, category)
+            for title, body, category in zip(titles, bodies, categories)
+        ]).tolist()
+
+    @staticmethod
+    def _category_text(title: str, body: str, category: str) -> str:
         # Prepend category to improve categorization-aware similarity
         prefix = f"[{category.upper()}]"
-        text = f"{prefix} {title}\n{body}"
-        model = self._load_model()
-        return model.encode(text).tolist()
+        return f"{prefix} {title}\n{body}"
 
     def embed_text(self, text: str):
-        model = self._load_model()
-        return model.encode(text).tolist()
+        return embed(text).tolist()
+
+    def embed_texts(self, texts: list[str]):
+        """Embed many texts in one batched forward pass."""
+        return encode_many(texts).tolist()
@@ -199,7 +199,7 @@ export default function IssueDetail({
     );
   }
 
-  const handleGenerateSolution = async () => {
+  const handleGenerateSolution = async (fresh = false) => {
     setGenerating(true);
     setGenError(null);
 
@@ -213,7 +213,8 @@ export default function IssueDetail({
         issue.title,
         issue.body || "",
         owner,
-        repo
+        repo,
+        fresh
       );
       setSolution(result.solution);
       setWasCached(result.cached);
@@ -237,8 +238,8 @@ export default function IssueDetail({
     } finally {
       setRegenerating(false);
     }
-    // Immediately generate fresh solution
-    await handleGenerateSolution();
+    // Immediately generate fresh solution, bypassing the GPT response cache
+    await handleGenerateSolution(true);
   };
 
   const getTypeColor = (type?: string) => {
@@ -452,7 +453,7 @@ export default function IssueDetail({
                 </div>
 
                 <button
-                  onClick={handleGenerateSolution}
+                  onClick={() => handleGenerateSolution()}
                   disabled={generating}
                   className={`
                     ml-4 flex shrink-0 items-center gap-2 rounded-lg px-4 py-2 text-sm font-semibold
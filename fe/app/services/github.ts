@@ -404,14 +404,15 @@ export interface GeneratedSolution {
 
 /**
  * Generate (or retrieve cached) AI solution for a GitHub issue.
- * Calls POST /api/solution/generate.
+ * Calls POST /api/solution/generate; fresh skips every cached answer.
  */
 export async function generateSolution(
   issueId: string,
   title: string,
   body: string,
   owner: string,
-  repo: string
+  repo: string,
+  fresh = false
 ): Promise<{ cached: boolean; solution: GeneratedSolution }> {
   const res = await fetch(`${API_BASE}/api/solution/generate`, {
     method: "POST",
@@ -422,6 +423,7 @@ export async function generateSolution(
       body,
       owner,
       repo,
+      fresh,
     }),
   });
 